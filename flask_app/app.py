@@ -7,16 +7,18 @@
 # 고객사 관리 기능 추가
 # CKEditor 5 통합 추가
 
-from flask import Flask, request, redirect, url_for, render_template, flash, send_from_directory, session, jsonify
+from flask import Flask, Request, request, abort, redirect, url_for, render_template, flash, send_from_directory, session, jsonify, g, has_request_context
 import mysql.connector
 from mysql.connector import pooling
 import logging
 import os
 import uuid
 import json
+import base64
 from datetime import datetime, timedelta
 import pytz
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import time
 import threading
 from queue import Queue, Empty
@@ -25,6 +27,14 @@ import atexit
 import signal
 import sys
 from dotenv import load_dotenv
+from urllib.parse import quote
+from werkzeug.utils import send_from_directory as werkzeug_send_from_directory
+
+# 에디터 이미지 축소본 생성용 (Pillow가 없으면 원본만 제공)
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
 import random
 import string
 import smtplib
@@ -32,6 +42,14 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import re
 import html
+import bisect
+import hashlib
+import mmap
+import tempfile
+import fcntl
+import click
+import struct
+from array import array
 
 # .env 파일 로드
 load_dotenv()
@@ -86,8 +104,128 @@ if not DB_CONFIG['password']:
 # ZIP 파일 최대 크기 설정 (100MiB)
 MAX_ZIP_SIZE = int(os.getenv('MAX_ZIP_SIZE', '104857600'))  # 100MiB in bytes
 
+# 첨부 파일을 임시 파일을 거치지 않고 UPLOAD_FOLDER에 바로 기록 (False면 Werkzeug 기본 임시 파일 사용)
+UPLOAD_STREAMING = os.getenv('UPLOAD_STREAMING', 'True').lower() == 'true'
+
+# 게시글 한 번에 올리는 첨부 파일 합계 제한(바이트, 기본 0: 제한 없음) - 설정하면 사전 확인(/check_file_size)에서
+# 같은 기준으로 거부하고, Content-Length가 이 값 + 여유분(본문/multipart 헤더용)을 넘는 요청은 본문을 받기 전에 거부
+MAX_UPLOAD_REQUEST_SIZE = int(os.getenv('MAX_UPLOAD_REQUEST_SIZE', '0'))
+UPLOAD_REQUEST_OVERHEAD = 1024 * 1024
+
+# 이어받기 업로드: 조각 최대 크기 / 마지막 조각 이후 보관 시간(초) / 만료 세션 정리 주기(초)
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', '86400'))
+UPLOAD_SESSION_GC_INTERVAL = int(os.getenv('UPLOAD_SESSION_GC_INTERVAL', '600'))
+
+# 첨부 파일 다운로드 전송을 앞단 웹 서버에 맡김
+# (off: Flask가 직접 전송, nginx: X-Accel-Redirect, sendfile: X-Sendfile - Apache mod_xsendfile/lighttpd)
+DOWNLOAD_OFFLOAD = os.getenv('DOWNLOAD_OFFLOAD', 'off').lower()
+# nginx에서 UPLOAD_FOLDER를 가리키는 internal location 경로
+DOWNLOAD_ACCEL_PREFIX = os.getenv('DOWNLOAD_ACCEL_PREFIX', '/protected-uploads/')
+# 에디터 이미지(/uploads/<파일명>) 브라우저 캐시 유지 시간(초) - 저장 파일명은 내용이 바뀌지 않으므로 길게 둠
+UPLOAD_CACHE_MAX_AGE = int(os.getenv('UPLOAD_CACHE_MAX_AGE', str(365 * 24 * 3600)))
+
+# 에디터 이미지 축소본: 허용 최대 너비 목록 / 게시글 본문 기본 표시 너비 / 저장 형식(webp | jpeg) / 품질 / 업로드 시 미리 생성
+IMAGE_DERIVATIVE_WIDTHS = sorted(int(w) for w in os.getenv('IMAGE_DERIVATIVE_WIDTHS', '320,800,1600').split(',') if w.strip())
+IMAGE_DISPLAY_WIDTH = int(os.getenv('IMAGE_DISPLAY_WIDTH', '800'))
+IMAGE_DERIVATIVE_FORMAT = os.getenv('IMAGE_DERIVATIVE_FORMAT', 'webp').lower()
+IMAGE_DERIVATIVE_QUALITY = int(os.getenv('IMAGE_DERIVATIVE_QUALITY', '80'))
+IMAGE_DERIVATIVE_ON_UPLOAD = os.getenv('IMAGE_DERIVATIVE_ON_UPLOAD', 'True').lower() == 'true'
+# 에디터 이미지로 올릴 수 있는 확장자 (축소본도 이 확장자의 파일만 만듦)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+
+if Image is None:
+    app.logger.warning("Pillow is not installed. Editor images will be served without resized versions.")
+
 # 연결 풀 설정
 DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+# 이 시간(초) 이상 유휴 상태였던 연결만 체크아웃 시 SELECT 1로 검증
+DB_POOL_VALIDATION_IDLE = float(os.getenv('DB_POOL_VALIDATION_IDLE', '30'))
+# 연결 최대 수명(초) - 초과한 연결은 백그라운드에서 재생성 (0이면 비활성화)
+DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '3600'))
+# 풀에 항상 유지할 최소 유휴 연결 수
+DB_POOL_MIN_IDLE = int(os.getenv('DB_POOL_MIN_IDLE', '2'))
+# 백그라운드 유지보수 스레드 실행 주기(초)
+DB_POOL_MAINTENANCE_INTERVAL = float(os.getenv('DB_POOL_MAINTENANCE_INTERVAL', '30'))
+# 연결을 병렬로 생성할 때 사용할 스레드 수 (초기화 및 백그라운드 보충)
+DB_POOL_CONNECT_WORKERS = int(os.getenv('DB_POOL_CONNECT_WORKERS', '5'))
+
+# 부하 차단(admission control) 설정 - False면 기존 재시도 방식 사용
+DB_ADMISSION_CONTROL = os.getenv('DB_ADMISSION_CONTROL', 'True').lower() == 'true'
+# 연결을 기다리는 최대 시간(초)
+DB_MAX_WAIT = float(os.getenv('DB_MAX_WAIT', '3'))
+# 동시에 연결을 기다릴 수 있는 최대 요청 수 (초과 시 즉시 503)
+DB_MAX_WAITERS = int(os.getenv('DB_MAX_WAITERS', str(DB_POOL_SIZE * 2)))
+# 연속 연결 실패가 이 횟수에 도달하면 서킷 브레이커 개방
+DB_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('DB_CIRCUIT_FAILURE_THRESHOLD', '5'))
+# 서킷 브레이커 개방 유지 시간(초) - 이후 한 요청으로 DB 상태를 재확인
+DB_CIRCUIT_RESET_TIMEOUT = float(os.getenv('DB_CIRCUIT_RESET_TIMEOUT', '30'))
+# 풀이 포화 상태일 때 Retry-After 헤더 값(초)
+DB_RETRY_AFTER = int(os.getenv('DB_RETRY_AFTER', '5'))
+
+# 읽기 전용 복제본(replica) 설정 - DB_REPLICA_HOST가 없으면 모든 쿼리를 기본 DB로 보냄
+DB_REPLICA_HOST = os.getenv('DB_REPLICA_HOST', '')
+REPLICA_DB_CONFIG = dict(
+    DB_CONFIG,
+    host=DB_REPLICA_HOST,
+    port=int(os.getenv('DB_REPLICA_PORT', str(DB_CONFIG['port']))),
+    user=os.getenv('DB_REPLICA_USER', DB_CONFIG['user']),
+    password=os.getenv('DB_REPLICA_PASSWORD', DB_CONFIG['password'])
+)
+DB_REPLICA_POOL_SIZE = int(os.getenv('DB_REPLICA_POOL_SIZE', str(DB_POOL_SIZE)))
+# 복제 지연이 이 값(초)을 넘으면 복제본을 사용하지 않음
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+# 복제 지연 확인 주기(초)
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '5'))
+# 사용자가 직접 쓴 데이터를 바로 볼 수 있도록 쓰기 후 이 시간(초) 동안은 기본 DB에서 읽음
+DB_READ_YOUR_WRITES_WINDOW = float(os.getenv('DB_READ_YOUR_WRITES_WINDOW', '10'))
+
+# 고객사 게시글 저장 방식 (새로 추가되는 고객사에 적용)
+#   table  : 고객사마다 customer_<name>, customer_<name>_files 테이블 생성 (기존 방식)
+#   shared : 모든 고객사 게시글을 customer_posts/customer_post_files 테이블에 customer_id로 구분하여 저장
+CUSTOMER_STORAGE_MODE = os.getenv('CUSTOMER_STORAGE_MODE', 'table')
+# customer_posts 테이블 파티션 수 (0이면 파티션 사용 안 함, 파티션 사용 시 외래 키 없이 생성)
+CUSTOMER_POSTS_PARTITIONS = int(os.getenv('CUSTOMER_POSTS_PARTITIONS', '0'))
+# 고객사 정보 캐시의 DB 버전 확인 주기(초) - 다른 인스턴스에서 변경한 내용은 최대 이 시간 뒤에 반영
+CUSTOMER_REGISTRY_CHECK_INTERVAL = float(os.getenv('CUSTOMER_REGISTRY_CHECK_INTERVAL', '5'))
+
+# 게시글 목록 페이지 이동 설정 (created_at, id 기준 커서 방식)
+# 번호 링크는 현재 페이지 앞뒤로 이 수만큼만 표시 (이동 시 OFFSET이 이 범위로 제한됨)
+PAGINATION_WINDOW = int(os.getenv('PAGINATION_WINDOW', '5'))
+# 커서 없이 ?page=N으로 접근할 때 허용하는 최대 OFFSET(행 수) - 넘으면 허용 범위의 마지막 페이지로 이동
+PAGINATION_MAX_OFFSET = int(os.getenv('PAGINATION_MAX_OFFSET', '1000'))
+
+# 검색 방식
+#   fulltext : DB의 FULLTEXT 인덱스 사용
+#   index    : 애플리케이션 내장 역색인(SearchIndex) 사용 - DB 설정을 바꿀 수 없는 환경용
+#   like     : 기존 LIKE '%검색어%' 방식
+# fulltext/index여도 인덱스로 찾을 수 없는 검색어(너무 짧은 단어 등)는 LIKE로 검색
+SEARCH_MODE = os.getenv('SEARCH_MODE', 'fulltext')
+# 내장 역색인 저장 파일 경로 / 변경 내용을 파일에 저장하는 주기(초)
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_index.bin'))
+SEARCH_INDEX_FLUSH_INTERVAL = float(os.getenv('SEARCH_INDEX_FLUSH_INTERVAL', '30'))
+# FULLTEXT 인덱스 파서
+#   auto  : 서버 종류로 결정 (MySQL은 ngram, ngram 파서가 없는 MariaDB는 기본 파서)
+#   ngram : 한글 부분 일치용 MySQL ngram 파서
+#   빈 값 : 기본 파서
+SEARCH_FULLTEXT_PARSER = os.getenv('SEARCH_FULLTEXT_PARSER', 'auto')
+# 검색어 해석 방식
+#   all     : 모든 단어를 포함한 글 (+단어1 +단어2)
+#   any     : 단어 중 하나라도 포함한 글
+#   raw     : 입력을 그대로 BOOLEAN MODE 검색식으로 사용 (+, -, "구문", * 등)
+#   natural : NATURAL LANGUAGE MODE
+SEARCH_FULLTEXT_SYNTAX = os.getenv('SEARCH_FULLTEXT_SYNTAX', 'all')
+# FULLTEXT로 찾을 수 있는 최소 단어 길이 (ngram_token_size 또는 innodb_ft_min_token_size와 맞춤)
+SEARCH_FULLTEXT_MIN_TOKEN = int(os.getenv('SEARCH_FULLTEXT_MIN_TOKEN', '2'))
+# FULLTEXT 검색 결과 정렬 (relevance: 관련도 순, recent: 최신 글 순)
+SEARCH_ORDER = os.getenv('SEARCH_ORDER', 'relevance')
+
+# 통합 검색(/search) - 게시판별 검색을 동시에 실행할 스레드 수 / 전체 검색 최대 대기 시간(초, 넘기면 남은 게시판은 실패로 표시)
+GLOBAL_SEARCH_WORKERS = int(os.getenv('GLOBAL_SEARCH_WORKERS', '4'))
+GLOBAL_SEARCH_TIMEOUT = float(os.getenv('GLOBAL_SEARCH_TIMEOUT', '10'))
+
+# 대시보드 통계 캐시 유지 시간(초) - 경과 후 첫 조회 시 백그라운드에서 다시 계산
+DASHBOARD_CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', '60'))
 
 # 서버 설정
 SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
@@ -104,102 +242,352 @@ logging.basicConfig(
 # 2FA 코드 저장소 (메모리 기반 - 실제 운영에서는 Redis 등 사용 권장)
 two_fa_codes = {}
 
+class PoolExhaustedError(Exception):
+    """연결 풀의 모든 연결이 사용 중일 때 발생"""
+    pass
+
+class DatabaseUnavailableError(Exception):
+    """DB를 사용할 수 없어 요청을 즉시 거부할 때 발생 (503 응답)"""
+
+    def __init__(self, message, retry_after=DB_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """DB 연결 실패용 서킷 브레이커 (closed -> open -> half_open)"""
+
+    def __init__(self, failure_threshold=DB_CIRCUIT_FAILURE_THRESHOLD, reset_timeout=DB_CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_progress = False
+
+    def allow_request(self):
+        """요청 허용 여부. open 상태에서 reset_timeout이 지나면 한 요청만 시험 통과"""
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self.trial_in_progress:
+                self.trial_in_progress = True
+                return True
+            return False
+
+    def retry_after(self):
+        """다음 시도까지 남은 시간(초)"""
+        with self.lock:
+            if self.state == 'closed':
+                return DB_RETRY_AFTER
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        return max(int(remaining + 0.999), 1)
+
+    def record_success(self):
+        with self.lock:
+            if self.state != 'closed':
+                app.logger.info("Database circuit breaker closed")
+            self.state = 'closed'
+            self.failures = 0
+            self.trial_in_progress = False
+
+    def cancel_trial(self):
+        """DB 상태와 무관한 이유로 시험 요청이 끝나지 못한 경우 다음 요청이 시험하도록 함"""
+        with self.lock:
+            self.trial_in_progress = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_progress = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    app.logger.error(f"Database circuit breaker opened after {self.failures} failures")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def get_state(self):
+        with self.lock:
+            return {'state': self.state, 'failures': self.failures}
+
+class LatencyHistogram:
+    """고정 버킷 기반 소요 시간 히스토그램 (초 단위)"""
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """측정값 기록"""
+        with self.lock:
+            self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self):
+        """현재 값을 dict로 반환 (버킷은 누적 개수)"""
+        with self.lock:
+            buckets = []
+            cumulative = 0
+            for bound, bucket_count in zip(self.BUCKETS + ('+Inf',), self.counts):
+                cumulative += bucket_count
+                buckets.append({'le': bound, 'count': cumulative})
+            return {
+                'count': self.count,
+                'sum': round(self.total, 6),
+                'avg': round(self.total / self.count, 6) if self.count else 0.0,
+                'max': round(self.max, 6),
+                'buckets': buckets
+            }
+
 class ConnectionPool:
     """Custom MariaDB/MySQL Connection Pool"""
 
-    def __init__(self, max_connections=DB_POOL_SIZE, **connection_kwargs):
+    def __init__(self, max_connections=DB_POOL_SIZE, validation_idle=DB_POOL_VALIDATION_IDLE,
+                 max_lifetime=DB_POOL_MAX_LIFETIME, min_idle=DB_POOL_MIN_IDLE,
+                 maintenance_interval=DB_POOL_MAINTENANCE_INTERVAL, connect_workers=DB_POOL_CONNECT_WORKERS,
+                 **connection_kwargs):
         self.max_connections = max_connections
+        self.validation_idle = validation_idle
+        self.max_lifetime = max_lifetime
+        self.min_idle = min(min_idle, max_connections)
+        self.maintenance_interval = maintenance_interval
+        self.connect_workers = max(connect_workers, 1)
         self.connection_kwargs = connection_kwargs
         self.pool = Queue(maxsize=max_connections)
         self.active_connections = 0
         self.lock = threading.Lock()
         self._closed = False
 
+        # 연결별 메타데이터 (id(conn) -> {'created_at', 'last_used'})
+        self._conn_meta = {}
+        self._stop_event = threading.Event()
+        self._refill_event = threading.Event()
+        # 마지막 연결 생성 시도에서 DB에 연결하지 못했는지 여부
+        self._connect_failing = False
+
+        # 계측 데이터
+        self.wait_time = LatencyHistogram()
+        self.checkout_duration = LatencyHistogram()
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkout_count = 0
+        self.replaced_count = 0
+        self.exhausted_count = 0
+
         # 초기 연결 생성
         self._initialize_pool()
 
+        # 백그라운드 유지보수 스레드 시작
+        self._maintenance_thread = threading.Thread(
+            target=self._maintenance_loop, name='db-pool-maintenance', daemon=True
+        )
+        self._maintenance_thread.start()
+
+        # 죽은 연결을 대신할 새 연결을 만드는 백그라운드 보충 스레드 시작
+        self._refill_thread = threading.Thread(
+            target=self._refill_loop, name='db-pool-refill', daemon=True
+        )
+        self._refill_thread.start()
+        if self.active_connections < self.max_connections:
+            self._refill_event.set()
+
     def _initialize_pool(self):
-        """연결 풀 초기화"""
+        """연결 풀 초기화 (연결을 병렬로 생성)"""
         try:
-            for _ in range(self.max_connections):
-                conn = self._create_connection()
-                if conn:
-                    self.pool.put(conn)
-                    self.active_connections += 1
+            self._fill_pool()
             app.logger.info(f"Connection pool initialized with {self.active_connections} connections")
         except Exception as e:
             app.logger.error(f"Failed to initialize connection pool: {e}")
 
+    def _fill_pool(self, replacement=False):
+        """부족한 연결을 병렬로 생성해 풀을 채움. 생성된 연결 수 반환"""
+        with self.lock:
+            deficit = self.max_connections - self.active_connections
+            if deficit <= 0 or self._closed:
+                return 0
+            # 생성 중인 연결도 활성 연결로 미리 계산하여 초과 생성 방지
+            self.active_connections += deficit
+
+        created = 0
+        try:
+            with ThreadPoolExecutor(max_workers=min(deficit, self.connect_workers)) as executor:
+                for conn in executor.map(lambda _: self._create_connection(), range(deficit)):
+                    if not conn:
+                        continue
+                    if self._closed:
+                        self._close_connection(conn)
+                        continue
+                    self.pool.put_nowait(conn)
+                    created += 1
+        finally:
+            with self.lock:
+                self.active_connections -= deficit - created
+                self._connect_failing = created < deficit
+                if replacement:
+                    self.replaced_count += created
+        return created
+
+    def _refill_loop(self):
+        """버려진 연결 수만큼 백그라운드에서 새 연결 생성 (실패 시 지수 백오프로 재시도)"""
+        backoff = 1
+        while not self._stop_event.is_set():
+            self._refill_event.wait()
+            self._refill_event.clear()
+            if self._closed:
+                return
+
+            try:
+                created = self._fill_pool(replacement=True)
+                if created:
+                    app.logger.info(f"Refilled connection pool with {created} new connections")
+            except Exception as e:
+                app.logger.error(f"Connection pool refill error: {e}")
+
+            with self.lock:
+                missing = self.active_connections < self.max_connections
+            if missing:
+                # DB에 연결할 수 없는 상태 - 잠시 후 다시 시도
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, 30)
+                self._refill_event.set()
+            else:
+                backoff = 1
+
+    def _discard_connection(self, conn):
+        """죽은 연결을 버리고 백그라운드 보충 요청 (요청 스레드에서 연결을 만들지 않음)"""
+        self._close_connection(conn)
+        with self.lock:
+            self.active_connections -= 1
+        self._refill_event.set()
+
     def _create_connection(self):
         """새로운 데이터베이스 연결 생성"""
         try:
             connection = mysql.connector.connect(**self.connection_kwargs)
             connection.autocommit = False
+            now = time.monotonic()
+            self._conn_meta[id(connection)] = {'created_at': now, 'last_used': now}
             return connection
         except Exception as e:
             app.logger.error(f"Failed to create database connection: {e}")
             return None
 
+    def _close_connection(self, conn):
+        """연결을 닫고 메타데이터 제거"""
+        self._conn_meta.pop(id(conn), None)
+        try:
+            conn.close()
+        except:
+            pass
+
+    def _idle_time(self, conn, now):
+        """마지막 사용 이후 경과 시간(초)"""
+        meta = self._conn_meta.get(id(conn))
+        return now - meta['last_used'] if meta else float('inf')
+
+    def _is_expired(self, conn, now):
+        """최대 수명을 초과했는지 확인"""
+        if self.max_lifetime <= 0:
+            return False
+        meta = self._conn_meta.get(id(conn))
+        return meta is None or now - meta['created_at'] > self.max_lifetime
+
+    def _mark_checked_out(self, conn):
+        """체크아웃 시각 및 사용 중 연결 수 기록"""
+        meta = self._conn_meta.get(id(conn))
+        if meta:
+            meta['checked_out_at'] = time.monotonic()
+        with self.lock:
+            self.checkout_count += 1
+            self.in_use += 1
+            if self.in_use > self.peak_in_use:
+                self.peak_in_use = self.in_use
+
+    def _mark_returned(self, conn):
+        """연결 점유 시간 기록"""
+        meta = self._conn_meta.get(id(conn))
+        checked_out_at = meta.pop('checked_out_at', None) if meta else None
+        if checked_out_at is not None:
+            self.checkout_duration.observe(time.monotonic() - checked_out_at)
+        with self.lock:
+            self.in_use = max(self.in_use - 1, 0)
+
     def get_connection(self, timeout=30):
         """연결 풀에서 연결 가져오기"""
         if self._closed:
             raise Exception("Connection pool is closed")
 
+        wait_start = time.monotonic()
+        deadline = wait_start + timeout
         try:
-            # 풀에서 연결 가져오기
-            conn = self.pool.get(timeout=timeout)
-
-            # 연결 상태 확인
-            if not self._is_connection_alive(conn):
-                app.logger.warning("Dead connection found, creating new one")
-                conn.close()
-                conn = self._create_connection()
-                if not conn:
-                    raise Exception("Failed to create new connection")
-
+            while True:
+                # 풀에서 연결 가져오기
+                conn = self.pool.get(timeout=max(deadline - time.monotonic(), 0))
+
+                # 일정 시간 이상 유휴 상태였던 연결만 상태 확인 (최근 사용된 연결은 검증 생략)
+                if self._idle_time(conn, time.monotonic()) > self.validation_idle and not self._is_connection_alive(conn):
+                    # 새 연결은 백그라운드에서 만들고, 요청은 풀의 다른 연결을 기다림
+                    app.logger.warning("Dead connection found, discarding it")
+                    self._discard_connection(conn)
+                    continue
+                break
+
+            self.wait_time.observe(time.monotonic() - wait_start)
+            self._mark_checked_out(conn)
             return conn
 
         except Empty:
-            # 풀이 비어있으면 새 연결 생성 시도
+            self.wait_time.observe(time.monotonic() - wait_start)
+
             with self.lock:
-                if self.active_connections < self.max_connections:
-                    conn = self._create_connection()
-                    if conn:
-                        self.active_connections += 1
-                        return conn
+                refill_pending = self.active_connections < self.max_connections
+                connect_failing = self._connect_failing
+            if refill_pending:
+                self._refill_event.set()
+                if connect_failing:
+                    # 보충 스레드가 DB에 연결하지 못함 (DB 연결 불가 상태)
+                    raise Exception("Failed to create new connection")
 
-            raise Exception("Connection pool exhausted and cannot create new connection")
+            with self.lock:
+                self.exhausted_count += 1
+            app.logger.warning(f"Connection pool exhausted ({self.max_connections} connections in use)")
+            raise PoolExhaustedError("Connection pool exhausted and cannot create new connection")
 
     def return_connection(self, conn):
         """연결을 풀에 반환"""
+        self._mark_returned(conn)
+
         if self._closed:
-            try:
-                conn.close()
-            except:
-                pass
+            self._close_connection(conn)
             return
 
         try:
-            if self._is_connection_alive(conn):
-                # 트랜잭션 롤백 및 초기화
+            # 트랜잭션 롤백 및 초기화 - 롤백이 실패하면 죽은 연결로 간주
+            try:
                 conn.rollback()
-                self.pool.put_nowait(conn)
-            else:
-                # 죽은 연결은 닫고 새 연결 생성
-                conn.close()
-                new_conn = self._create_connection()
-                if new_conn:
-                    self.pool.put_nowait(new_conn)
-                else:
-                    with self.lock:
-                        self.active_connections -= 1
+            except Exception:
+                app.logger.warning("Rollback failed on returned connection, discarding it")
+                self._discard_connection(conn)
+                return
+
+            meta = self._conn_meta.get(id(conn))
+            if meta:
+                meta['last_used'] = time.monotonic()
+            self.pool.put_nowait(conn)
 
         except Exception as e:
             app.logger.error(f"Error returning connection to pool: {e}")
-            try:
-                conn.close()
-            except:
-                pass
+            self._discard_connection(conn)
 
     def _is_connection_alive(self, conn):
         """연결이 살아있는지 확인"""
@@ -212,20 +600,194 @@ class ConnectionPool:
         except:
             return False
 
+    def _maintenance_loop(self):
+        """백그라운드 유지보수: 유휴 연결 ping, 수명 초과 연결 재생성, 최소 유휴 연결 유지"""
+        while not self._stop_event.wait(self.maintenance_interval):
+            try:
+                self._run_maintenance()
+            except Exception as e:
+                app.logger.error(f"Connection pool maintenance error: {e}")
+
+    def _run_maintenance(self):
+        """유지보수 1회 실행"""
+        # 현재 풀에 있는 유휴 연결만 한 번씩 검사 (사용 중인 연결은 건드리지 않음)
+        for _ in range(self.pool.qsize()):
+            if self._closed:
+                return
+            try:
+                conn = self.pool.get_nowait()
+            except Empty:
+                break
+
+            now = time.monotonic()
+            # 최소 유휴 연결 수를 남겨두고 교체 (동시에 생성된 연결이 한꺼번에 빠지지 않도록)
+            if self._is_expired(conn, now) and self.pool.qsize() >= self.min_idle:
+                app.logger.info("Recycling connection that exceeded max lifetime")
+                self._discard_connection(conn)
+                conn = None
+            elif self._idle_time(conn, now) > self.validation_idle:
+                if self._is_connection_alive(conn):
+                    self._conn_meta[id(conn)]['last_used'] = time.monotonic()
+                else:
+                    app.logger.warning("Dead idle connection found during maintenance, replacing it")
+                    self._discard_connection(conn)
+                    conn = None
+
+            if conn:
+                self.pool.put_nowait(conn)
+
+        # 최소 유휴 연결 수 유지
+        while not self._closed and self.pool.qsize() < self.min_idle:
+            with self.lock:
+                if self.active_connections >= self.max_connections:
+                    break
+                self.active_connections += 1
+            conn = self._create_connection()
+            if not conn:
+                with self.lock:
+                    self.active_connections -= 1
+                break
+            self.pool.put_nowait(conn)
+
+    def get_stats(self):
+        """풀 상태 및 계측 데이터 반환"""
+        with self.lock:
+            stats = {
+                'max_connections': self.max_connections,
+                'active_connections': self.active_connections,
+                'idle_connections': self.pool.qsize(),
+                'in_use': self.in_use,
+                'peak_in_use': self.peak_in_use,
+                'checkouts': self.checkout_count,
+                'replaced_connections': self.replaced_count,
+                'exhausted': self.exhausted_count,
+                'closed': self._closed
+            }
+        stats['wait_time'] = self.wait_time.snapshot()
+        stats['checkout_duration'] = self.checkout_duration.snapshot()
+        return stats
+
     def close_all(self):
         """모든 연결 닫기"""
         self._closed = True
+        self._stop_event.set()
+        self._refill_event.set()
         while not self.pool.empty():
             try:
                 conn = self.pool.get_nowait()
-                conn.close()
+                self._close_connection(conn)
             except:
                 pass
         self.active_connections = 0
         app.logger.info("Connection pool closed")
 
+# 등록된 스냅샷 캐시 목록 (쓰기 요청 후 일괄 invalidate)
+snapshot_caches = []
+
+class SnapshotCache:
+    """TTL 기반 스냅샷 캐시 (stale-while-revalidate)
+
+    최초 조회만 동기로 계산하고, 이후에는 TTL이 지났거나 invalidate()로 dirty 표시된
+    경우에도 기존 값을 바로 반환하면서 백그라운드 스레드에서 다시 계산한다.
+    loader(read_only)는 마지막 invalidate() 후 DB_READ_YOUR_WRITES_WINDOW 동안 read_only=False로
+    호출되어, 복제 지연으로 쓰기 전 값이 다시 캐시되지 않도록 기본 DB에서 읽는다.
+    """
+
+    def __init__(self, name, loader, ttl):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refresh_event = threading.Event()
+        self._worker = None
+        self.value = None
+        self.etag = None
+        self.loaded_at = None
+        self.dirty = False
+        self.invalidated_at = None
+        snapshot_caches.append(self)
+
+    def get(self):
+        """캐시 값 반환 (필요 시 백그라운드 갱신 예약)"""
+        if self.loaded_at is None:
+            # 최초 조회: 동시에 여러 요청이 와도 한 번만 계산
+            with self._load_lock:
+                if self.loaded_at is None:
+                    return self.refresh()
+
+        with self.lock:
+            stale = self.dirty or time.monotonic() - self.loaded_at > self.ttl
+        if stale:
+            self._schedule_refresh()
+        return self.value
+
+    def get_with_etag(self):
+        """캐시 값과 값의 내용으로 계산한 강한 ETag를 함께 반환"""
+        self.get()
+        with self.lock:
+            return self.value, self.etag
+
+    def refresh(self):
+        """값을 즉시 다시 계산"""
+        with self.lock:
+            # 계산 중에 들어온 invalidate()는 다시 dirty로 표시됨
+            self.dirty = False
+            after_write = self.invalidated_at is not None and \
+                time.time() - self.invalidated_at < DB_READ_YOUR_WRITES_WINDOW
+        try:
+            value = self.loader(read_only=not after_write)
+        except Exception:
+            with self.lock:
+                self.dirty = True
+            raise
+        etag = hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        with self.lock:
+            self.value = value
+            self.etag = etag
+            self.loaded_at = time.monotonic()
+        return value
+
+    def invalidate(self):
+        """dirty 표시 후 백그라운드 갱신 예약"""
+        with self.lock:
+            self.dirty = True
+            self.invalidated_at = time.time()
+        if self.loaded_at is not None:
+            self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        """백그라운드 갱신 스레드 깨우기 (여러 번 호출되어도 한 번씩만 계산)"""
+        if self._worker is None:
+            with self.lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._refresh_loop, name=f'cache-refresh-{self.name}', daemon=True
+                    )
+                    self._worker.start()
+        self._refresh_event.set()
+
+    def _refresh_loop(self):
+        while True:
+            self._refresh_event.wait()
+            self._refresh_event.clear()
+            try:
+                self.refresh()
+                app.logger.debug(f"Snapshot cache '{self.name}' refreshed")
+            except Exception as e:
+                app.logger.error(f"Snapshot cache '{self.name}' refresh failed: {e}")
+
 # 데이터베이스 연결 풀 전역 변수
 db_pool = None
+replica_pool = None
+
+# 복제 지연 확인 결과 캐시
+replica_lag_state = {'checked_at': 0.0, 'healthy': False}
+replica_lag_lock = threading.Lock()
+
+# 부하 차단용 서킷 브레이커와 대기 요청 수 제한
+db_circuit_breaker = CircuitBreaker()
+db_waiters = threading.BoundedSemaphore(max(DB_MAX_WAITERS, 1))
 
 def init_db_pool():
     """데이터베이스 연결 풀 초기화"""
@@ -242,9 +804,141 @@ def init_db_pool():
         app.logger.error(f"Database connection pool initialization failed: {e}")
         db_pool = None
 
-@contextmanager
-def get_db_connection():
-    """표준 MySQL 커넥션 풀 사용"""
+    init_replica_pool()
+
+def init_replica_pool():
+    """읽기 전용 복제본 연결 풀 초기화 (설정된 경우에만)"""
+    global replica_pool
+    if not DB_REPLICA_HOST:
+        return
+    try:
+        if replica_pool is not None:
+            replica_pool.close_all()
+
+        replica_pool = ConnectionPool(max_connections=DB_REPLICA_POOL_SIZE, **REPLICA_DB_CONFIG)
+        replica_lag_state['checked_at'] = 0.0
+        app.logger.info(f"Replica connection pool initialized ({DB_REPLICA_HOST})")
+
+    except Exception as e:
+        app.logger.error(f"Replica connection pool initialization failed: {e}")
+        replica_pool = None
+
+def _check_replica_lag():
+    """복제본의 복제 지연이 허용 범위인지 확인 (DB_REPLICA_LAG_CHECK_INTERVAL 동안 결과 캐시)"""
+    if time.monotonic() - replica_lag_state['checked_at'] < DB_REPLICA_LAG_CHECK_INTERVAL:
+        return replica_lag_state['healthy']
+
+    # 다른 스레드가 확인 중이면 이전 결과 사용
+    if not replica_lag_lock.acquire(blocking=False):
+        return replica_lag_state['healthy']
+
+    healthy = False
+    try:
+        conn = replica_pool.get_connection(timeout=1)
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("SHOW SLAVE STATUS")
+            status = cursor.fetchone()
+            cursor.close()
+        finally:
+            replica_pool.return_connection(conn)
+
+        if status is None:
+            # 복제 설정이 없는 서버 (예: 읽기 전용 미러) - 지연 없음으로 간주
+            healthy = True
+        else:
+            lag = status.get('Seconds_Behind_Master')
+            healthy = lag is not None and lag <= DB_REPLICA_MAX_LAG
+            if not healthy:
+                app.logger.warning(f"Replica lag too high or replication stopped (lag: {lag}), reading from primary")
+    except Exception as e:
+        app.logger.warning(f"Replica lag check failed, reading from primary: {e}")
+    finally:
+        replica_lag_state['healthy'] = healthy
+        replica_lag_state['checked_at'] = time.monotonic()
+        replica_lag_lock.release()
+
+    return healthy
+
+def replica_available():
+    """복제본 풀이 있고 복제 지연이 허용 범위인지 확인"""
+    if replica_pool is None or replica_pool._closed:
+        return False
+    return _check_replica_lag()
+
+def should_use_replica():
+    """현재 요청의 읽기 쿼리를 복제본으로 보낼 수 있는지 확인"""
+    # read-your-writes: 최근에 직접 쓴 사용자는 기본 DB에서 읽음
+    last_write_at = session.get('last_write_at')
+    if last_write_at and time.time() - last_write_at < DB_READ_YOUR_WRITES_WINDOW:
+        return False
+
+    return replica_available()
+
+def _acquire_request_db_connection():
+    """요청 범위 연결을 가져옴 - 읽기 전용 라우트는 가능하면 복제본 사용"""
+    if g.get('use_replica'):
+        try:
+            connection = replica_pool.get_connection(timeout=DB_MAX_WAIT)
+            g.db_conn_pool = replica_pool
+            return connection
+        except Exception as e:
+            app.logger.warning(f"Replica connection unavailable, falling back to primary: {e}")
+            g.use_replica = False
+
+    connection = _acquire_db_connection()
+    g.db_conn_pool = db_pool
+    return connection
+
+def _acquire_db_connection():
+    """풀에서 연결을 가져옴"""
+    if DB_ADMISSION_CONTROL:
+        return _acquire_db_connection_fast_fail()
+    return _acquire_db_connection_with_retry()
+
+def _reject_db_request(message, retry_after):
+    """DB 요청 거부 - 요청 중이면 503 응답으로 변환되도록 표시"""
+    if has_request_context():
+        g.db_unavailable_retry_after = retry_after
+    raise DatabaseUnavailableError(message, retry_after)
+
+def clear_db_rejection():
+    """DB 거부 예외를 잡아 대체 값(캐시 등)으로 정상 응답하는 경우 호출 - 503으로 바꾸지 않음"""
+    if has_request_context():
+        g.pop('db_unavailable_retry_after', None)
+
+def _acquire_db_connection_fast_fail():
+    """부하 차단 모드: 재시도 없이 제한된 시간만 기다리고 실패 시 즉시 거부"""
+    if db_pool is None or db_pool._closed:
+        _reject_db_request("Database connection pool is not available", DB_RETRY_AFTER)
+
+    if not db_circuit_breaker.allow_request():
+        _reject_db_request("Database circuit breaker is open", db_circuit_breaker.retry_after())
+
+    # 대기열이 가득 차면 기다리지 않고 거부
+    if not db_waiters.acquire(blocking=False):
+        app.logger.warning("Too many requests waiting for a database connection")
+        db_circuit_breaker.cancel_trial()
+        _reject_db_request("Too many requests waiting for a database connection", DB_RETRY_AFTER)
+
+    try:
+        connection = db_pool.get_connection(timeout=DB_MAX_WAIT)
+    except PoolExhaustedError as e:
+        # 풀 포화는 DB 장애가 아님
+        db_circuit_breaker.cancel_trial()
+        _reject_db_request(str(e), DB_RETRY_AFTER)
+    except Exception as e:
+        app.logger.error(f"Database connection error: {e}")
+        db_circuit_breaker.record_failure()
+        _reject_db_request(f"Failed to establish database connection: {e}", db_circuit_breaker.retry_after())
+    finally:
+        db_waiters.release()
+
+    db_circuit_breaker.record_success()
+    return connection
+
+def _acquire_db_connection_with_retry():
+    """기존 방식: 풀에서 연결을 가져옴 (재시도 포함)"""
     connection = None
     max_retries = 3
     retry_delay = 1
@@ -261,10 +955,48 @@ def get_db_connection():
             time.sleep(retry_delay)
             retry_delay *= 2
     
+    return connection
+
+@contextmanager
+def get_db_connection(read_only=False):
+    """표준 MySQL 커넥션 풀 사용
+
+    요청 처리 중에는 flask.g에 바인딩된 하나의 연결을 모든 헬퍼 함수가 재사용하고,
+    요청 종료 시(teardown) 한 번만 풀에 반환한다. 요청 컨텍스트 밖에서는 블록마다
+    연결을 가져오고 반환한다. read_only=True면 가능한 경우 블록 동안 별도의 복제본 연결을
+    사용한다(요청 중에도 요청 연결이 기본 DB일 때 - 예: 스냅샷 캐시 최초 계산).
+    (요청 연결의 복제본 사용 여부는 @read_replica 데코레이터가 결정)
+    """
+    in_request = has_request_context()
+    connection = None
+    pool = db_pool
+    if read_only and not (in_request and g.get('use_replica')) and replica_available():
+        try:
+            connection = replica_pool.get_connection(timeout=DB_MAX_WAIT)
+            pool = replica_pool
+        except Exception as e:
+            app.logger.warning(f"Replica connection unavailable, falling back to primary: {e}")
+    # 요청 범위 연결 사용 여부 (별도 복제본 연결을 가져왔으면 블록이 끝날 때 반환)
+    bound = in_request and connection is None
+    
+    if bound:
+        connection = g.get('db_conn')
+        if connection is None:
+            connection = _acquire_request_db_connection()
+            g.db_conn = connection
+        depth = g.get('db_conn_depth', 0)
+        g.db_conn_depth = depth + 1
+        # 중첩된 with 블록은 바깥 블록의 트랜잭션을 건드리지 않음
+        outermost = depth == 0
+    else:
+        if connection is None:
+            connection = _acquire_db_connection()
+        outermost = True
+    
     try:
         yield connection
     except Exception as e:
-        if connection:
+        if connection and outermost:
             try:
                 connection.rollback()
             except:
@@ -272,12 +1004,86 @@ def get_db_connection():
         app.logger.error(f"Database operation error: {e}")
         raise
     finally:
-        if connection:
+        if bound:
+            g.db_conn_depth -= 1
+            # 블록이 끝나면 커밋되지 않은 트랜잭션을 정리 (풀 반환 시와 동일한 동작)
+            if outermost:
+                try:
+                    if connection.in_transaction:
+                        connection.rollback()
+                except Exception as rollback_error:
+                    app.logger.warning(f"Error resetting request connection: {rollback_error}")
+        elif connection:
             try:
-                db_pool.return_connection(connection)
+                pool.return_connection(connection)
             except Exception as close_error:
                 app.logger.warning(f"Error closing connection: {close_error}")
 
+def _db_unavailable_response(retry_after):
+    """503 + Retry-After 응답 생성"""
+    message = '서버가 혼잡합니다. 잠시 후 다시 시도해주세요.'
+    if request.path.startswith('/api/') or request.is_json or request.accept_mimetypes.best == 'application/json':
+        response = jsonify({'success': False, 'message': message})
+    else:
+        response = app.response_class(message, mimetype='text/plain')
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@app.errorhandler(DatabaseUnavailableError)
+def handle_database_unavailable(e):
+    """라우트에서 처리되지 않은 DB 거부 예외"""
+    g.pop('db_unavailable_retry_after', None)
+    return _db_unavailable_response(e.retry_after)
+
+@app.after_request
+def track_user_writes(response):
+    """쓰기 요청 후 read-your-writes 창 동안 해당 사용자의 읽기를 기본 DB로 보내도록 기록"""
+    if request.method in ('POST', 'PUT', 'DELETE') and g.get('db_conn_pool') is db_pool and 'db_conn' in g and is_logged_in():
+        session['last_write_at'] = time.time()
+    return response
+
+@app.after_request
+def invalidate_snapshot_caches(response):
+    """DB에 쓰기를 한 요청이 성공하면 스냅샷 캐시를 dirty로 표시"""
+    if request.method in ('POST', 'PUT', 'DELETE') and g.get('db_conn_pool') is db_pool and 'db_conn' in g \
+            and response.status_code < 500:
+        for cache in snapshot_caches:
+            cache.invalidate()
+    return response
+
+@app.after_request
+def apply_db_admission_control(response):
+    """DB 사용 불가로 거부된 요청은 라우트의 오류 처리 결과 대신 503 + Retry-After로 응답
+
+    거부 예외를 잡아 대체 값으로 처리한 경로는 clear_db_rejection()으로 표시를 지우므로 그대로 응답한다.
+    """
+    retry_after = g.pop('db_unavailable_retry_after', None)
+    if retry_after is None:
+        return response
+    return _db_unavailable_response(retry_after)
+
+@app.teardown_request
+def discard_streaming_uploads(exc):
+    """요청 종료 시 저장(commit)되지 않은 업로드 임시 파일 삭제 (본문 파싱 도중 실패한 경우 포함)"""
+    for upload in g.pop('streaming_uploads', []):
+        upload.close()
+
+@app.teardown_request
+def release_db_connection(exc):
+    """요청 종료 시 요청 범위 연결을 풀에 반환"""
+    connection = g.pop('db_conn', None)
+    pool = g.pop('db_conn_pool', None)
+    g.pop('db_conn_depth', None)
+    if connection is not None:
+        try:
+            if pool is not None:
+                pool.return_connection(connection)
+            else:
+                connection.close()
+        except Exception as close_error:
+            app.logger.warning(f"Error closing connection: {close_error}")
+
 def load_identity():
     """identity.json 파일에서 사용자 정보를 읽어옴"""
     try:
@@ -386,6 +1192,14 @@ def is_logged_in():
     """사용자가 로그인되어 있는지 확인"""
     return 'logged_in' in session and session['logged_in']
 
+def read_replica(f):
+    """읽기 전용 라우트에 사용할 데코레이터 - 요청 내 모든 DB 조회를 가능하면 복제본으로 보냄"""
+    def decorated_function(*args, **kwargs):
+        g.use_replica = should_use_replica()
+        return f(*args, **kwargs)
+    decorated_function.__name__ = f.__name__
+    return decorated_function
+
 def login_required(f):
     """로그인이 필요한 페이지에 사용할 데코레이터"""
     def decorated_function(*args, **kwargs):
@@ -415,6 +1229,9 @@ def allowed_file(filename):
 
 def get_file_size(file_obj):
     """파일 객체의 크기를 바이트 단위로 반환"""
+    stream = getattr(file_obj, 'stream', None)
+    if isinstance(stream, StreamingUpload):
+        return stream.size
     file_obj.seek(0, 2)
     size = file_obj.tell()
     file_obj.seek(0)
@@ -428,7 +1245,1089 @@ def format_file_size(size_bytes):
         return f"{size_bytes / 1024:.1f}KB"
     else:
         return f"{size_bytes}B"
+
+class StreamingUpload:
+    """multipart 본문을 읽는 동안 업로드 파일을 UPLOAD_FOLDER의 임시 파일에 바로 기록하는 스트림
+
+    기록하면서 크기와 SHA-256을 계산하고, ZIP 파일이 MAX_ZIP_SIZE를 넘으면 그 즉시 기록을
+    멈추고 임시 파일을 지운다. 읽기는 중단하지 않으므로 남은 본문은 끝까지 받아 버리며(디스크에는 쓰지 않음),
+    크기는 계속 집계해 기존과 같은 오류 메시지를 보여준다. 본문을 받기 전에 거부하려면 MAX_UPLOAD_REQUEST_SIZE를 설정한다.
+    commit()으로 최종 파일명에 rename하며, commit되지 않은 임시 파일은 요청 종료 시 삭제된다.
+    """
+    
+    def __init__(self, filename):
+        self.limit = MAX_ZIP_SIZE if filename.lower().endswith('.zip') else None
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.path = os.path.join(app.config['UPLOAD_FOLDER'], f".upload-{uuid.uuid4().hex}.part")
+        self.file = open(self.path, 'w+b')
+        self.committed = False
+    
+    @property
+    def oversize(self):
+        return self.limit is not None and self.size > self.limit
+    
+    @property
+    def sha256(self):
+        return self.digest.hexdigest()
+    
+    def write(self, data):
+        self.size += len(data)
+        if self.file is None:
+            return len(data)
+        if self.oversize:
+            app.logger.warning(f"Upload exceeded {self.limit} bytes, discarding {self.path}")
+            self._discard()
+            return len(data)
+        self.digest.update(data)
+        return self.file.write(data)
+    
+    def read(self, *args):
+        return self.file.read(*args) if self.file else b''
+    
+    def readline(self, *args):
+        return self.file.readline(*args) if self.file else b''
+    
+    def seek(self, *args):
+        return self.file.seek(*args) if self.file else 0
+    
+    def tell(self):
+        return self.file.tell() if self.file else 0
+    
+    def commit(self, file_path):
+        """기록을 마친 임시 파일을 file_path로 rename (같은 파일시스템 안에서 원자적으로 교체)"""
+        if self.file is None:
+            raise ValueError("업로드 파일이 크기 제한을 초과해 저장되지 않았습니다.")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        self.file = None
+        os.replace(self.path, file_path)
+        self.committed = True
+    
+    def _discard(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if not self.committed:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+    
+    def close(self):
+        self._discard()
+
+class UploadRequest(Request):
+    """첨부 파일을 StreamingUpload로 받는 요청 클래스"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if UPLOAD_STREAMING and filename:
+            try:
+                upload = StreamingUpload(filename)
+                g.setdefault('streaming_uploads', []).append(upload)
+                return upload
+            except OSError as e:
+                app.logger.warning(f"Streaming upload unavailable, using temp file: {e}")
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+app.request_class = UploadRequest
+
+@app.before_request
+def reject_oversized_upload():
+    """MAX_UPLOAD_REQUEST_SIZE를 설정한 경우, Content-Length가 이미 제한을 넘는 첨부 파일 요청은 본문을 읽기 전에 거부
+
+    응답에 Connection: close를 붙여 남은 본문을 받지 않고 연결을 끊는다.
+    (제한이 없으면 ZIP 크기 초과는 StreamingUpload가 본문을 끝까지 받은 뒤에야 알려 줄 수 있음)
+    """
+    if not MAX_UPLOAD_REQUEST_SIZE or request.mimetype != 'multipart/form-data':
+        return None
+    if (request.content_length or 0) <= MAX_UPLOAD_REQUEST_SIZE + UPLOAD_REQUEST_OVERHEAD:
+        return None
+    
+    message = (f"첨부 파일 전체 크기가 {format_file_size(MAX_UPLOAD_REQUEST_SIZE)}를 초과합니다 "
+               f"(현재 크기: {format_file_size(request.content_length)})")
+    app.logger.warning(f"Rejected upload to {request.path}: {request.content_length} bytes")
+    if request.accept_mimetypes.accept_html:
+        flash(message)
+        response = redirect(request.referrer or url_for('index'))
+    else:
+        response = jsonify({'success': False, 'message': message})
+        response.status_code = 413
+    # 남은 본문을 읽지 않도록 응답 후 연결 종료
+    response.headers['Connection'] = 'close'
+    return response
+
+def store_upload(file, file_path):
+    """업로드 파일을 file_path에 저장 (스트리밍 업로드는 rename, 그 외에는 복사)"""
+    if isinstance(file.stream, StreamingUpload):
+        file.stream.commit(file_path)
+    else:
+        file.save(file_path)
+
+def upload_relpath(file_name):
+    """저장 파일의 새 배치 경로 (UPLOAD_FOLDER 기준, 파일명 앞 4글자로 ab/cd/<파일명> 2단계 하위 디렉터리)
+
+    uuid/SHA-256 파일명이 아니면(앞 4글자가 16진수가 아니면) 최상위에 둔다.
+    """
+    prefix = file_name[:4].lower()
+    if len(prefix) == 4 and all(c in '0123456789abcdef' for c in prefix):
+        return os.path.join(prefix[:2], prefix[2:], file_name)
+    return file_name
+
+def upload_path(file_name):
+    """새 파일을 쓸 절대 경로 (하위 디렉터리가 없으면 생성)"""
+    path = os.path.join(app.config['UPLOAD_FOLDER'], upload_relpath(file_name))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def find_upload(file_name):
+    """저장 파일의 UPLOAD_FOLDER 기준 상대 경로, 없으면 None
+
+    새 배치 → 이전 평면 배치 → 새 배치 순으로 확인해 migrate-upload-layout이 옮기는 중인 파일도 찾는다.
+    """
+    relpath = upload_relpath(file_name)
+    for candidate in (relpath, file_name, relpath):
+        if os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], candidate)):
+            return candidate
+    return None
+
+def send_upload(file_relpath, download_name=None, immutable=False):
+    """UPLOAD_FOLDER의 파일 응답 (download_name을 주면 첨부 파일로 내려받음)
+
+    저장 파일명(uuid/SHA-256)은 한 번 쓰면 내용이 바뀌지 않으므로 파일명을 강한 ETag로 쓰고,
+    If-None-Match/If-Range/Range를 처리한다. immutable이면 UPLOAD_CACHE_MAX_AGE 동안 다시 확인하지 않게 한다.
+    DOWNLOAD_OFFLOAD가 설정되면 Content-Type/Content-Disposition 헤더만 만들고 파일 전송은 웹 서버에 넘긴다.
+    """
+    as_attachment = download_name is not None
+    offload = DOWNLOAD_OFFLOAD in ('nginx', 'sendfile')
+    environ = request.environ
+    if offload:
+        # Range 요청은 파일을 보내는 웹 서버가 처리 (Flask는 304 여부만 판단)
+        environ = {key: value for key, value in environ.items() if key not in ('HTTP_RANGE', 'HTTP_IF_RANGE')}
+    
+    response = werkzeug_send_from_directory(
+        app.config['UPLOAD_FOLDER'], file_relpath, environ,
+        as_attachment=as_attachment, download_name=download_name,
+        etag=os.path.basename(file_relpath),
+        max_age=UPLOAD_CACHE_MAX_AGE if immutable else None,
+        use_x_sendfile=offload, response_class=app.response_class, _root_path=app.root_path,
+    )
+    # 로그인한 사용자만 볼 수 있는 파일이므로 공유 캐시(프록시)에는 저장하지 않음
+    response.cache_control.public = False
+    response.cache_control.private = True
+    if immutable:
+        response.cache_control.immutable = True
+    
+    if DOWNLOAD_OFFLOAD == 'nginx' and 'X-Sendfile' in response.headers:
+        # 본문은 nginx가 internal location에서 직접 보내므로 길이 헤더도 nginx에 맡김
+        del response.headers['X-Sendfile']
+        response.headers.pop('Content-Length', None)
+        response.headers['X-Accel-Redirect'] = DOWNLOAD_ACCEL_PREFIX.rstrip('/') + '/' + quote(file_relpath.replace(os.sep, '/'))
+    return response
+
+def remove_upload(file_name):
+    """저장 파일 삭제 (이전 평면 배치 → 새 배치 순으로 시도해 옮기는 중인 파일도 삭제), 삭제했으면 True"""
+    for candidate in (file_name, upload_relpath(file_name)):
+        try:
+            os.remove(os.path.join(app.config['UPLOAD_FOLDER'], candidate))
+            return True
+        except FileNotFoundError:
+            continue
+    return False
+
+def file_sha256(file_obj):
+    """파일 객체 전체의 SHA-256 (읽은 뒤 처음 위치로 되돌림)"""
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(1024 * 1024), b''):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+def upload_sha256(file):
+    """업로드 파일의 SHA-256 (스트리밍 업로드는 받으면서 계산한 값 사용)"""
+    if isinstance(file.stream, StreamingUpload):
+        return file.stream.sha256
+    return file_sha256(file.stream)
+
+def acquire_blob(db, sha256, file_size):
+    """같은 내용의 blob 참조 수를 1 늘리고 (저장 파일명, 파일을 새로 써야 하는지) 반환 (commit하지 않음)
+
+    처음 보는 내용이면 blob 레코드를 만들고, 호출한 쪽이 commit 전에 파일을 써야 한다.
+    같은 내용을 동시에 올리면 나중 트랜잭션은 먼저 만든 blob 레코드의 잠금이 풀릴 때까지 기다린다.
+    """
+    cursor = db.cursor()
+    cursor.execute("""
+        INSERT INTO file_blobs (sha256, file_name, file_size, ref_count)
+        VALUES (%s, %s, %s, 1)
+        ON DUPLICATE KEY UPDATE ref_count = ref_count + 1
+    """, (sha256, sha256, file_size))
+    if cursor.rowcount == 1:
+        cursor.close()
+        return sha256, True
+    cursor.execute("SELECT file_name FROM file_blobs WHERE sha256 = %s", (sha256,))
+    file_name = cursor.fetchall()[0][0]
+    cursor.close()
+    # 레코드만 남고 파일이 없어진 경우 다시 씀
+    return file_name, find_upload(file_name) is None
+
+def release_blobs(db, files):
+    """첨부 파일 레코드를 지우기 전에 호출 - blob 참조 수를 줄이고, 더 이상 참조되지 않는 저장 파일명 목록 반환
+
+    실제 파일은 지우지 않는다(commit하지 않음). 롤백되면 참조 수가 되살아나므로, 호출한 쪽이 commit에
+    성공한 뒤 remove_released_files로 지워야 한다. blob으로 저장되지 않은 이전 첨부 파일(blob_sha256 NULL)은
+    항상 목록에 포함된다.
+    """
+    released = []
+    cursor = db.cursor()
+    for file_info in files:
+        sha256 = file_info.get('blob_sha256')
+        if sha256:
+            cursor.execute("UPDATE file_blobs SET ref_count = ref_count - 1 WHERE sha256 = %s", (sha256,))
+            cursor.execute("DELETE FROM file_blobs WHERE sha256 = %s AND ref_count <= 0", (sha256,))
+            if cursor.rowcount == 0:
+                continue
+        released.append(file_info['file_name'])
+    cursor.close()
+    return released
+
+BLOB_FILE_NAME_RE = re.compile(r'[0-9a-f]{64}')
+
+def _remove_upload_and_derivatives(file_name):
+    try:
+        if remove_upload(file_name):
+            app.logger.info(f"File deleted: {file_name}")
+        remove_image_derivatives(file_name)
+    except Exception as file_error:
+        app.logger.warning(f"Failed to delete file {file_name}: {file_error}")
+
+def remove_released_files(file_names):
+    """release_blobs가 반환한 저장 파일과 그 이미지 축소본 삭제 (트랜잭션 commit 후에 호출)
+
+    blob 파일은 지우기 전에 새 트랜잭션에서 같은 sha256의 빈 레코드(ref_count 0)를 넣어 잠근다.
+    commit 이후 같은 내용이 다시 올라와 레코드가 이미 있으면 그 업로드가 쓴 파일이므로 지우지 않고,
+    잠근 동안 들어온 acquire_blob은 삭제가 끝나고 빈 레코드가 지워질 때까지 기다렸다가 파일을 새로 쓴다.
+    """
+    blob_names = [file_name for file_name in file_names if BLOB_FILE_NAME_RE.fullmatch(file_name)]
+    # blob으로 저장되지 않은 이전 첨부 파일은 다시 참조될 일이 없으므로 바로 삭제
+    for file_name in file_names:
+        if file_name not in blob_names:
+            _remove_upload_and_derivatives(file_name)
+    if not blob_names:
+        return
+    
+    with get_db_connection() as db:
+        cursor = db.cursor()
+        for file_name in blob_names:
+            try:
+                cursor.execute("""
+                    INSERT IGNORE INTO file_blobs (sha256, file_name, file_size, ref_count)
+                    VALUES (%s, %s, 0, 0)
+                """, (file_name, file_name))
+                if cursor.rowcount == 0:
+                    db.rollback()
+                    app.logger.info(f"File reused before deletion, kept: {file_name}")
+                    continue
+            except Exception as lock_error:
+                # 다시 참조되었는지 확인할 수 없으면 지우지 않음 (파일이 남는 쪽이 안전)
+                app.logger.warning(f"Failed to lock blob {file_name}, file kept: {lock_error}")
+                db.rollback()
+                continue
+            
+            _remove_upload_and_derivatives(file_name)
+            try:
+                cursor.execute("DELETE FROM file_blobs WHERE sha256 = %s AND ref_count = 0", (file_name,))
+                db.commit()
+            except Exception as unlock_error:
+                # commit하지 못한 빈 레코드는 롤백으로 사라짐
+                app.logger.warning(f"Failed to release blob lock {file_name}: {unlock_error}")
+                db.rollback()
+        cursor.close()
+
+class ResumableUploadStore:
+    """이어받기(조각) 업로드 세션 저장소
+
+    세션마다 UPLOAD_FOLDER/.resumable 아래에 <id>.json(파일명, 크기, 소유자)과 <id>.part(받은 데이터)를
+    둔다. 받은 바이트 수는 .part 파일 크기이므로 여러 프로세스가 DB 없이 같은 세션을 이어받을 수 있고,
+    조각 기록은 .part 파일의 flock으로 직렬화한다. 마지막 기록 후 UPLOAD_SESSION_TTL이 지난 세션은
+    백그라운드 스레드(첫 세션 생성 시 시작)나 cleanup-uploads 명령이 삭제한다.
+    """
+    
+    ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._collector = None
+    
+    @property
+    def directory(self):
+        return os.path.join(app.config['UPLOAD_FOLDER'], '.resumable')
+    
+    def _paths(self, upload_id):
+        if not self.ID_PATTERN.match(upload_id or ''):
+            return None, None
+        base = os.path.join(self.directory, upload_id)
+        return base + '.json', base + '.part'
+    
+    def create(self, name, size, owner):
+        """새 세션 생성 후 ID 반환"""
+        os.makedirs(self.directory, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        meta_path, part_path = self._paths(upload_id)
+        open(part_path, 'wb').close()
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'name': name, 'size': size, 'owner': owner, 'created_at': time.time()}, f)
+        self._start_collector()
+        return upload_id
+    
+    def get(self, upload_id, owner):
+        """세션 정보(받은 바이트 수 offset 포함) 반환, 없거나 다른 사용자의 세션이면 None"""
+        meta_path, part_path = self._paths(upload_id)
+        if meta_path is None:
+            return None
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            offset = os.path.getsize(part_path)
+        except (OSError, ValueError):
+            return None
+        if meta.get('owner') != owner:
+            return None
+        meta['offset'] = offset
+        meta['expires_at'] = os.path.getmtime(part_path) + UPLOAD_SESSION_TTL
+        return meta
+    
+    def write_chunk(self, upload_id, offset, stream, length):
+        """offset 위치에 조각 기록 후 (현재 offset, 기록 여부) 반환
+
+        offset이 이미 받은 크기와 다르면 기록하지 않는다. 연결이 끊겨 조각 일부만 받았으면 받은 만큼만
+        남으므로, 클라이언트는 세션의 offset을 다시 조회해 그 위치부터 이어 보내면 된다.
+        """
+        _, part_path = self._paths(upload_id)
+        with open(part_path, 'r+b') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            current = os.fstat(f.fileno()).st_size
+            if offset != current:
+                return current, False
+            f.seek(offset)
+            remaining = length
+            while remaining > 0:
+                data = stream.read(min(remaining, 64 * 1024))
+                if not data:
+                    break
+                f.write(data)
+                remaining -= len(data)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell(), True
+    
+    def part_path(self, upload_id):
+        return self._paths(upload_id)[1]
+    
+    def take(self, upload_id, file_path):
+        """다 받은 세션 파일을 file_path로 옮김 (세션 정보는 남김 - 첨부를 마치면 discard, 실패하면 restore)"""
+        os.replace(self.part_path(upload_id), file_path)
+    
+    def restore(self, upload_id, file_path):
+        """take로 옮긴 파일을 세션으로 되돌림 (같은 세션으로 다시 finalize 가능)"""
+        os.replace(file_path, self.part_path(upload_id))
+    
+    def discard(self, upload_id):
+        for path in self._paths(upload_id):
+            if path:
+                self._remove(path)
+    
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def cleanup(self):
+        """마지막 기록 후 UPLOAD_SESSION_TTL이 지난 세션 삭제, 삭제한 세션 수 반환"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        deadline = time.time() - UPLOAD_SESSION_TTL
+        removed = 0
+        for name in names:
+            upload_id, ext = os.path.splitext(name)
+            if ext not in ('.json', '.part'):
+                continue
+            try:
+                if os.path.getmtime(os.path.join(self.directory, name)) >= deadline:
+                    continue
+            except OSError:
+                continue
+            meta_path, part_path = self._paths(upload_id)
+            if meta_path is None:
+                continue
+            try:
+                # .json은 생성 시에만 쓰이므로 받은 데이터(.part)의 수정 시각으로 판단
+                if os.path.getmtime(part_path) >= deadline:
+                    continue
+            except OSError:
+                pass
+            self._remove(meta_path)
+            self._remove(part_path)
+            removed += 1
+        if removed:
+            app.logger.info(f"Removed {removed} expired upload sessions")
+        return removed
+    
+    def _start_collector(self):
+        if self._collector is None:
+            with self.lock:
+                if self._collector is None:
+                    self._collector = threading.Thread(target=self._collect_loop, name='upload-session-gc', daemon=True)
+                    self._collector.start()
+    
+    def _collect_loop(self):
+        while True:
+            try:
+                self.cleanup()
+            except Exception as e:
+                app.logger.error(f"Upload session cleanup failed: {e}")
+            time.sleep(UPLOAD_SESSION_GC_INTERVAL)
+
+resumable_uploads = ResumableUploadStore()
+
+# 목록용 본문 요약(summary 컬럼) 최대 길이
+SUMMARY_LENGTH = 100
+
+def make_summary(content):
+    """목록 표시용 본문 요약 (HTML 태그를 제거한 앞부분 텍스트, 글 작성/수정 시 저장)"""
+    text = re.sub(r'<[^>]*>', '', html.unescape(content or ''))
+    return ' '.join(text.split())[:SUMMARY_LENGTH]
+
+def short_text(post):
+    """목록에 표시할 내용 앞부분 (summary가 아직 채워지지 않은 글은 본문에서 계산)"""
+    summary = post.get('summary')
+    if summary is None:
+        summary = make_summary(post.get('content'))
+    return summary[:25] + ('...' if len(summary) > 25 else '')
+
+def encode_page_cursor(direction, post, page, skip=0):
+    """페이지 이동 커서 생성 (기준 게시글의 created_at/id를 담은 불투명 문자열)
+
+    direction: 'n'이면 기준 글 다음(더 오래된 글), 'p'면 기준 글 이전(더 최근 글)
+    skip: 기준 글에서 건너뛸 행 수 (번호 링크로 여러 페이지를 이동할 때 사용)
+    """
+    payload = {'d': direction, 'c': post['created_at'].isoformat(), 'i': post['id'], 'pg': page, 's': skip}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_page_cursor(token):
+    """페이지 이동 커서 해석 (잘못된 값이면 None)"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        return {
+            'direction': 'p' if payload['d'] == 'p' else 'n',
+            'created_at': datetime.fromisoformat(payload['c']),
+            'id': int(payload['i']),
+            'page': max(int(payload['pg']), 1),
+            'skip': min(max(int(payload.get('s', 0)), 0), PAGINATION_MAX_OFFSET),
+        }
+    except Exception:
+        return None
+
+def fetch_post_page(cursor, posts_table, conditions, params, page, page_cursor, per_page, stats_board=None, rank=None,
+                    matched_ids=None):
+    """게시글 목록 한 페이지 조회 (created_at, id 기준 keyset 페이지 이동)
+
+    커서가 있으면 기준 게시글 다음/이전 행부터 인덱스를 따라 읽으므로 페이지 깊이와 관계없이
+    같은 시간이 걸린다. 커서 없는 ?page=N 접근은 첫/마지막 페이지를 제외하고
+    PAGINATION_MAX_OFFSET 범위 안에서만 OFFSET으로 처리한다.
+    stats_board가 있으면(검색 조건 없는 목록) 전체 글 수를 COUNT(*) 대신 board_stats에서 읽는다.
+    rank(정렬식, 파라미터)가 있으면 관련도 순으로 정렬하고 PAGINATION_MAX_OFFSET 범위까지만 OFFSET으로 이동한다.
+    matched_ids(내장 역색인 검색 결과, 오름차순 ID 배열)가 있으면 DB에서는 해당 페이지의 글만 ID로 읽는다.
+    (posts, pagination) 반환 - pagination은 템플릿의 페이지 링크 정보
+    """
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+    if matched_ids is not None:
+        total_posts = len(matched_ids)
+    else:
+        if stats_board:
+            cursor.execute("SELECT COALESCE(SUM(post_count), 0) as count FROM board_stats WHERE board = %s", (stats_board,))
+        else:
+            cursor.execute(f"SELECT COUNT(*) as count FROM {posts_table} p{where_clause}", tuple(params))
+        total_posts = max(int(cursor.fetchone()['count']), 0)
+    total_pages = (total_posts + per_page - 1) // per_page if total_posts > 0 else 1
+    
+    # 본문은 summary가 비어 있는(백필 전) 글만 읽음
+    select_clause = f"""
+        SELECT p.id, p.title, p.summary, CASE WHEN p.summary IS NULL THEN p.content END as content,
+               p.created_at, p.file_count
+        FROM {posts_table} p
+    """
+    
+    def run(extra_conditions, extra_params, ascending, limit, offset):
+        all_conditions = conditions + extra_conditions
+        where = " WHERE " + " AND ".join(all_conditions) if all_conditions else ""
+        order = "ASC" if ascending else "DESC"
+        cursor.execute(f"""
+            {select_clause}{where}
+            ORDER BY p.created_at {order}, p.id {order}
+            LIMIT %s OFFSET %s
+        """, tuple(params) + tuple(extra_params) + (limit, offset))
+        rows = cursor.fetchall()
+        return rows[::-1] if ascending else rows
+    
+    keyset = rank is None and matched_ids is None
+    anchor = decode_page_cursor(page_cursor) if page_cursor and keyset else None
+    posts = []
+    if matched_ids is not None:
+        # ID 내림차순 (AUTO_INCREMENT이므로 작성 순서와 같음)
+        page = min(max(page, 1), total_pages)
+        end = total_posts - (page - 1) * per_page
+        page_ids = list(reversed(matched_ids[max(end - per_page, 0):end]))
+        if page_ids:
+            id_condition = f"p.id IN ({', '.join(['%s'] * len(page_ids))})"
+            cursor.execute(f"""
+                {select_clause} WHERE {" AND ".join(conditions + [id_condition])}
+                ORDER BY p.id DESC
+            """, tuple(params) + tuple(page_ids))
+            posts = cursor.fetchall()
+    elif rank is not None:
+        rank_expr, rank_params = rank
+        total_pages = min(total_pages, PAGINATION_MAX_OFFSET // per_page + 1)
+        page = min(max(page, 1), total_pages)
+        cursor.execute(f"""
+            {select_clause}{where_clause}
+            ORDER BY {rank_expr} DESC, p.id DESC
+            LIMIT %s OFFSET %s
+        """, tuple(params) + tuple(rank_params) + (per_page, (page - 1) * per_page))
+        posts = cursor.fetchall()
+    elif anchor:
+        page = min(anchor['page'], total_pages)
+        if anchor['direction'] == 'n':
+            seek = "(p.created_at < %s OR (p.created_at = %s AND p.id < %s))"
+        else:
+            seek = "(p.created_at > %s OR (p.created_at = %s AND p.id > %s))"
+        posts = run([seek], (anchor['created_at'], anchor['created_at'], anchor['id']),
+                    anchor['direction'] == 'p', per_page, anchor['skip'])
+    else:
+        page = min(max(page, 1), total_pages)
+        if page == total_pages and page > 1:
+            # 마지막 페이지는 역순으로 앞에서부터 읽음
+            posts = run([], (), True, total_posts - (total_pages - 1) * per_page, 0)
+        else:
+            max_page = PAGINATION_MAX_OFFSET // per_page + 1
+            if page > max_page:
+                app.logger.info(f"Page {page} exceeds offset limit, showing page {max_page} instead")
+                page = max_page
+            posts = run([], (), False, per_page, (page - 1) * per_page)
+    
+    if not posts and page > 1 and keyset:
+        # 기준 게시글이 삭제되었거나 목록이 바뀐 경우 첫 페이지로
+        page = 1
+        posts = run([], (), False, per_page, 0)
+    
+    pagination = {'page': page, 'total_pages': total_pages, 'prev': None, 'next': None, 'links': []}
+    if posts:
+        first, last = posts[0], posts[-1]
+        if page > 1:
+            pagination['prev'] = {'page': page - 1, 'cursor': encode_page_cursor('p', first, page - 1) if keyset and page > 2 else None}
+        if page < total_pages:
+            pagination['next'] = {'page': page + 1, 'cursor': encode_page_cursor('n', last, page + 1) if keyset and page + 1 < total_pages else None}
         
+        window_start = max(1, page - PAGINATION_WINDOW)
+        window_end = min(total_pages, page + PAGINATION_WINDOW)
+        for number in range(window_start, window_end + 1):
+            if not keyset or number == 1 or number == total_pages or number == page:
+                # 첫/마지막 페이지는 커서 없이 바로 조회 가능
+                token = None
+            elif number > page:
+                token = encode_page_cursor('n', last, number, (number - page - 1) * per_page)
+            else:
+                token = encode_page_cursor('p', first, number, (page - number - 1) * per_page)
+            pagination['links'].append({'page': number, 'cursor': token})
+        pagination['show_first'] = window_start > 1
+        pagination['show_last'] = window_end < total_pages
+    
+    offset = (page - 1) * per_page
+    for i, post in enumerate(posts):
+        post['seq'] = total_posts - (offset + i)
+    
+    return posts, pagination
+
+# 게시글 테이블별 FULLTEXT 인덱스 존재 여부 캐시 - {테이블: (존재 여부, 확인 시각)}
+fulltext_index_cache = {}
+# 인덱스가 없던 테이블을 다시 확인하는 주기(초) - create-search-indexes 실행 후 재시작 없이 반영
+FULLTEXT_INDEX_RECHECK_INTERVAL = 300
+# SEARCH_FULLTEXT_PARSER=auto일 때 서버 종류로 정한 파서 (처음 한 번만 확인)
+fulltext_parser_cache = {}
+
+def has_fulltext_index(db, posts_table):
+    """게시글 테이블에 검색용 FULLTEXT 인덱스가 있는지 확인 (결과는 캐시)"""
+    cached = fulltext_index_cache.get(posts_table)
+    if cached is None or (not cached[0] and time.monotonic() - cached[1] > FULLTEXT_INDEX_RECHECK_INTERVAL):
+        cursor = db.cursor()
+        cursor.execute("""
+            SELECT COUNT(*)
+            FROM information_schema.statistics
+            WHERE table_schema = %s AND table_name = %s AND index_name = 'ft_title_content'
+        """, (DB_CONFIG['database'], posts_table))
+        cached = fulltext_index_cache[posts_table] = (cursor.fetchone()[0] > 0, time.monotonic())
+        cursor.close()
+    return cached[0]
+
+def fulltext_parser(cursor):
+    """사용할 FULLTEXT 파서 이름 (빈 문자열이면 기본 파서)"""
+    if SEARCH_FULLTEXT_PARSER != 'auto':
+        return SEARCH_FULLTEXT_PARSER
+    if 'parser' not in fulltext_parser_cache:
+        cursor.execute("SELECT VERSION() AS version")
+        row = cursor.fetchone()
+        version = row['version'] if isinstance(row, dict) else row[0]
+        fulltext_parser_cache['parser'] = '' if 'mariadb' in str(version).lower() else 'ngram'
+        app.logger.info(f"FULLTEXT parser for {version}: {fulltext_parser_cache['parser'] or 'built-in'}")
+    return fulltext_parser_cache['parser']
+
+def ensure_fulltext_index(cursor, posts_table):
+    """검색용 FULLTEXT 인덱스가 없으면 생성 (실패하면 해당 테이블은 LIKE로 검색)
+
+    기존 글이 많은 테이블은 오래 걸리므로 새 고객사 테이블 외에는 create-search-indexes 명령으로 생성한다.
+    """
+    if SEARCH_MODE != 'fulltext':
+        return
+    fulltext_index_cache.pop(posts_table, None)
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.statistics
+        WHERE table_schema = %s AND table_name = %s AND index_name = 'ft_title_content'
+    """, (DB_CONFIG['database'], posts_table))
+    if cursor.fetchone()[0] > 0:
+        return
+    
+    parser_name = fulltext_parser(cursor)
+    parser = f" WITH PARSER {parser_name}" if parser_name else ""
+    try:
+        cursor.execute(f"ALTER TABLE {posts_table} ADD FULLTEXT INDEX ft_title_content (title, content){parser}")
+        app.logger.info(f"FULLTEXT index created on {posts_table}")
+    except Exception as e:
+        # 예: 파서 미지원 서버, 파티션 테이블
+        app.logger.warning(f"Could not create FULLTEXT index on {posts_table}, search will use LIKE: {e}")
+
+def fulltext_query(keyword, parser):
+    """검색어를 FULLTEXT 검색식으로 변환 - (검색식, 검색 모드), 인덱스로 찾을 수 없는 검색어면 (None, None)"""
+    if SEARCH_FULLTEXT_SYNTAX == 'natural':
+        return keyword, 'NATURAL LANGUAGE MODE'
+    if SEARCH_FULLTEXT_SYNTAX == 'raw':
+        return keyword, 'BOOLEAN MODE'
+    
+    # 검색식 연산자로 해석되는 문자 제거
+    terms = re.sub(r'[+\-<>()~*"@]', ' ', keyword).split()
+    if not terms or any(len(term) < SEARCH_FULLTEXT_MIN_TOKEN for term in terms):
+        return None, None
+    
+    operator = '+' if SEARCH_FULLTEXT_SYNTAX == 'all' else ''
+    # 기본 파서는 단어 단위로 색인하므로 어절 앞부분 일치로 검색 (예: 서버 → 서버에서)
+    wildcard = '' if parser else '*'
+    return ' '.join(f"{operator}{term}{wildcard}" for term in terms), 'BOOLEAN MODE'
+
+def build_search_conditions(db, posts_table, keyword, board_key, scope=([], [])):
+    """검색 조건 생성 - (조건 목록, 파라미터 목록, fetch_post_page 추가 인자)
+
+    SEARCH_MODE에 따라 내장 역색인 또는 FULLTEXT 인덱스를 사용하고,
+    사용할 수 없으면 기존 LIKE 검색을 사용한다.
+    """
+    if SEARCH_MODE == 'index':
+        matched_ids = search_index.search(db, board_key, posts_table, scope, keyword)
+        if matched_ids is not None:
+            return [], [], {'matched_ids': matched_ids}
+    elif SEARCH_MODE == 'fulltext' and has_fulltext_index(db, posts_table):
+        cursor = db.cursor()
+        query, mode = fulltext_query(keyword, fulltext_parser(cursor))
+        cursor.close()
+        if query:
+            match = f"MATCH(p.title, p.content) AGAINST (%s IN {mode})"
+            rank = (match, [query]) if SEARCH_ORDER == 'relevance' else None
+            return [match], [query], {'rank': rank}
+    return ["(p.title LIKE %s OR p.content LIKE %s)"], [f'%{keyword}%', f'%{keyword}%'], {}
+
+# 영문/숫자 단어를 앞부분 일치로 찾기 위해 색인하는 최대 앞부분 길이 (더 긴 검색어는 이 길이까지만 비교)
+SEARCH_INDEX_PREFIX_MAX = 20
+
+def tokenize_text(text, query=False):
+    """색인/검색용 토큰 집합 (HTML 태그 제외)
+
+    한글은 2글자 단위로 나눈다. 영문/숫자 단어는 2글자 이상의 모든 앞부분을 색인해
+    'serv'로 'server'를 찾을 수 있게 하고, 검색어(query=True)는 단어 자체만 토큰으로 쓴다.
+    (한 글자 단어는 색인하지 않으며 SearchIndex.search에서 LIKE 검색으로 넘김)
+    """
+    text = html.unescape(re.sub(r'<[^>]*>', ' ', text or '')).lower()
+    tokens = set()
+    for word in re.findall(r'[가-힣]+|[a-z0-9]+', text):
+        if '가' <= word[0] <= '힣' and len(word) > 1:
+            tokens.update(word[i:i + 2] for i in range(len(word) - 1))
+        elif query:
+            tokens.add(word[:SEARCH_INDEX_PREFIX_MAX])
+        else:
+            tokens.update(word[:i] for i in range(2, min(len(word), SEARCH_INDEX_PREFIX_MAX) + 1))
+    return tokens
+
+class SearchIndex:
+    """게시글 제목/본문 내장 역색인 (SEARCH_MODE=index)
+
+    게시판별로 토큰 → 게시글 ID 배열(array, 오름차순)을 메모리에 두고 SEARCH_INDEX_PATH 파일에
+    저장한다. 시작 시 파일을 mmap으로 열어 두고 검색에 필요한 토큰의 배열만 읽어 온다.
+    처음 검색하는 게시판은 DB에서 전체 글을 읽어 색인하고, 이후에는 글 작성/수정/삭제 시 바로 반영한다.
+    다른 프로세스에서 작성된 글은 검색할 때 마지막으로 색인한 ID 이후의 글을 읽어 보충한다.
+    (다른 프로세스에서 수정/삭제한 글은 rebuild-search-index 전까지 이전 내용으로 검색될 수 있음)
+    """
+
+    MAGIC = b'WBSIDX2\n'
+    BATCH_SIZE = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        # board → {'max_id': 마지막으로 색인한 게시글 ID, 'tokens': {토큰: array('I')}}
+        self.boards = None
+        # board → {토큰: [파일 내 위치, 개수]} (아직 메모리로 읽지 않은 배열)
+        self._file_boards = {}
+        self._mmap = None
+        self.dirty = False
+        # self.lock 안에서 색인을 바꿀 때마다 증가 (저장하는 동안 바뀌었는지 확인)
+        self._version = 0
+        self._flusher = None
+        # 파일 저장은 한 번에 하나만 (self.lock과 별개라 저장 중에도 검색/색인 갱신이 기다리지 않음)
+        self._flush_lock = threading.Lock()
+        # board → 보충 색인을 한 번에 하나만 실행하기 위한 잠금
+        self._board_locks = {}
+        # board → 보충 색인 중 _apply로 바뀐 게시글 ID (DB에서 다시 읽어 색인)
+        self._catching_up = {}
+
+    def _load(self):
+        """저장된 색인 파일을 mmap으로 열기 (처음 한 번)"""
+        if self.boards is not None:
+            return
+        self.boards = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if mm[:len(self.MAGIC)] != self.MAGIC:
+                raise ValueError("invalid file header")
+            header_offset, header_length = struct.unpack('<QQ', mm[-16:])
+            header = json.loads(mm[header_offset:header_offset + header_length].decode('utf-8'))
+            if header['itemsize'] != array('I').itemsize:
+                raise ValueError("incompatible array item size")
+            for board, info in header['boards'].items():
+                self.boards[board] = {'max_id': info['max_id'], 'tokens': {}}
+                self._file_boards[board] = info['tokens']
+            self._mmap = mm
+            app.logger.info(f"Search index loaded: {len(self.boards)} boards from {self.path}")
+        except Exception as e:
+            app.logger.warning(f"Could not load search index {self.path}, boards will be re-indexed: {e}")
+            self.boards = {}
+            self._file_boards = {}
+
+    def _read_postings(self, board, token):
+        """토큰의 게시글 ID 배열 (메모리에 없으면 mmap에서 복사, 없으면 None)"""
+        postings = self.boards[board]['tokens'].get(token)
+        if postings is None:
+            location = self._file_boards.get(board, {}).get(token)
+            if location is not None:
+                offset, count = location
+                postings = array('I')
+                postings.frombytes(self._mmap[offset:offset + count * postings.itemsize])
+        return postings
+
+    def _postings(self, board, token, create=False):
+        """수정할 토큰 배열 (메모리로 읽어 둠)"""
+        self._version += 1
+        tokens = self.boards[board]['tokens']
+        postings = tokens.get(token)
+        if postings is None:
+            postings = self._read_postings(board, token)
+            if postings is None:
+                if not create:
+                    return None
+                postings = array('I')
+            tokens[token] = postings
+        return postings
+
+    def _add(self, board, post_id, tokens):
+        for token in tokens:
+            postings = self._postings(board, token, create=True)
+            if not postings or postings[-1] < post_id:
+                postings.append(post_id)
+            else:
+                i = bisect.bisect_left(postings, post_id)
+                if i == len(postings) or postings[i] != post_id:
+                    postings.insert(i, post_id)
+
+    def _remove(self, board, post_id, tokens):
+        for token in tokens:
+            postings = self._postings(board, token)
+            if postings:
+                i = bisect.bisect_left(postings, post_id)
+                if i < len(postings) and postings[i] == post_id:
+                    # 빈 배열도 남겨 두어야 파일의 이전 배열이 다시 읽히지 않음
+                    del postings[i]
+
+    def _board_lock(self, board):
+        with self.lock:
+            return self._board_locks.setdefault(board, threading.RLock())
+
+    def _catch_up(self, db, board, posts_table, scope):
+        """마지막으로 색인한 ID 이후의 글을 DB에서 읽어 색인 (게시판이 없으면 전체 색인)
+
+        DB 조회와 토큰 분리는 self.lock 밖에서 하고 배치마다 잠깐 잠가 합치므로, 그동안에도
+        글 작성/수정/삭제 반영(_apply)이 기다리지 않는다. 그 사이 바뀐 글은 마지막에 다시 읽어 색인한다.
+        """
+        with self._board_lock(board):
+            with self.lock:
+                self._load()
+                if board not in self.boards:
+                    self.boards[board] = {'max_id': 0, 'tokens': {}}
+                    app.logger.info(f"Building search index for board {board}...")
+                max_id = self.boards[board]['max_id']
+                touched = self._catching_up[board] = set()
+            
+            scope_conditions, scope_params = scope
+            cursor = db.cursor()
+            indexed = 0
+            try:
+                skipped = set()
+                where_clause = " AND ".join(scope_conditions + ["p.id > %s"])
+                while True:
+                    cursor.execute(f"""
+                        SELECT p.id, p.title, p.content FROM {posts_table} p
+                        WHERE {where_clause}
+                        ORDER BY p.id
+                        LIMIT %s
+                    """, (*scope_params, max_id, self.BATCH_SIZE))
+                    rows = cursor.fetchall()
+                    if not self._merge(board, rows, touched, skipped):
+                        return
+                    if rows:
+                        max_id = rows[-1][0]
+                    indexed += len(rows)
+                    if len(rows) < self.BATCH_SIZE:
+                        break
+                
+                # 읽은 뒤 수정/삭제된 글은 현재 내용으로 다시 색인 (삭제된 글은 조회되지 않음)
+                while skipped:
+                    post_ids = sorted(skipped)
+                    with self.lock:
+                        touched.clear()
+                    id_clause = " AND ".join(scope_conditions + [f"p.id IN ({', '.join(['%s'] * len(post_ids))})"])
+                    cursor.execute(f"SELECT p.id, p.title, p.content FROM {posts_table} p WHERE {id_clause}",
+                                   (*scope_params, *post_ids))
+                    skipped = set()
+                    if not self._merge(board, cursor.fetchall(), touched, skipped, advance=False):
+                        return
+            finally:
+                cursor.close()
+                with self.lock:
+                    self._catching_up.pop(board, None)
+        if indexed:
+            self._mark_dirty()
+            app.logger.info(f"Search index: {indexed} posts indexed for board {board}")
+
+    def _merge(self, board, rows, touched, skipped, advance=True):
+        """DB에서 읽은 글을 색인에 합침 (읽은 뒤 _apply로 바뀐 글은 skipped에 모음), 게시판 색인이 삭제됐으면 False"""
+        batch = [(post_id, tokenize_text(title) | tokenize_text(content)) for post_id, title, content in rows]
+        with self.lock:
+            info = self.boards.get(board)
+            if info is None:
+                return False
+            for post_id, tokens in batch:
+                if post_id in touched:
+                    skipped.add(post_id)
+                else:
+                    self._add(board, post_id, tokens)
+            if advance and batch:
+                info['max_id'] = max(info['max_id'], batch[-1][0])
+                self._version += 1
+        return True
+
+    def search(self, db, board, posts_table, scope, keyword):
+        """검색어의 모든 토큰을 포함한 게시글 ID 배열 (오름차순), 색인으로 찾을 수 없는 검색어면 None"""
+        text = keyword.lower()
+        # 한 글자 단어는 2글자 단위/앞부분 색인으로 찾을 수 없음
+        if any(len(word) == 1 for word in re.findall(r'[가-힣]+|[a-z0-9]+', text)):
+            return None
+        tokens = tokenize_text(text, query=True)
+        if not tokens:
+            return None
+        
+        self._catch_up(db, board, posts_table, scope)
+        with self.lock:
+            postings = []
+            for token in tokens:
+                found = self._read_postings(board, token)
+                if not found:
+                    return array('I')
+                postings.append(found)
+        
+        # 가장 짧은 배열부터 교집합
+        postings.sort(key=len)
+        result = set(postings[0])
+        for found in postings[1:]:
+            result.intersection_update(found)
+            if not result:
+                break
+        return array('I', sorted(result))
+
+    def index_post(self, board, post_id, title, content):
+        """새 글 색인 (아직 색인하지 않은 게시판이면 첫 검색 때 함께 색인됨)"""
+        self._apply(board, post_id, set(), tokenize_text(title) | tokenize_text(content))
+
+    def update_post(self, board, post_id, old_title, old_content, title, content):
+        """수정된 글의 토큰 반영"""
+        old_tokens = tokenize_text(old_title) | tokenize_text(old_content)
+        new_tokens = tokenize_text(title) | tokenize_text(content)
+        self._apply(board, post_id, old_tokens - new_tokens, new_tokens - old_tokens)
+
+    def remove_post(self, board, post_id, title, content):
+        """삭제된 글을 색인에서 제거"""
+        self._apply(board, post_id, tokenize_text(title) | tokenize_text(content), set())
+
+    def _apply(self, board, post_id, removed, added):
+        if SEARCH_MODE != 'index':
+            return
+        try:
+            with self.lock:
+                self._load()
+                if board not in self.boards:
+                    return
+                touched = self._catching_up.get(board)
+                if touched is not None:
+                    touched.add(post_id)
+                # max_id는 _catch_up에서만 옮김 (다른 프로세스의 글을 건너뛰지 않도록)
+                # 보충 시 같은 글을 다시 색인해도 중복 추가되지 않음
+                self._remove(board, post_id, removed)
+                self._add(board, post_id, added)
+            self._mark_dirty()
+        except Exception as e:
+            app.logger.error(f"Search index update failed for {board}/{post_id}: {e}")
+
+    def drop_board(self, board):
+        """게시판 색인 삭제 (고객사 삭제/저장 방식 이전 시)"""
+        if SEARCH_MODE != 'index':
+            return
+        with self.lock:
+            self._load()
+            self.boards.pop(board, None)
+            self._file_boards.pop(board, None)
+            self._version += 1
+        self._mark_dirty()
+
+    def rebuild(self, db, board, posts_table, scope=([], [])):
+        """게시판 색인을 DB로부터 다시 생성"""
+        with self._board_lock(board):
+            with self.lock:
+                self._load()
+                self.boards.pop(board, None)
+                self._file_boards.pop(board, None)
+                self._version += 1
+            self._catch_up(db, board, posts_table, scope)
+
+    def _mark_dirty(self):
+        self.dirty = True
+        if self._flusher is None:
+            with self.lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, name='search-index-flush', daemon=True)
+                    self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(SEARCH_INDEX_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                app.logger.error(f"Search index flush failed: {e}")
+
+    def flush(self):
+        """변경 내용을 파일에 저장 (임시 파일에 쓴 뒤 교체)
+
+        self.lock 안에서는 저장할 내용만 복사하고, 파일 쓰기와 fsync는 잠금 밖에서 한다.
+        임시 파일은 저장할 때마다 고유한 이름으로 만들어, 여러 워커 프로세스가 동시에 저장해도 섞이지 않는다.
+        저장하는 동안 색인이 바뀌었으면 메모리의 배열을 그대로 두고 다음 저장 때 다시 쓴다.
+        """
+        with self._flush_lock:
+            with self.lock:
+                if not self.dirty or self.boards is None:
+                    return
+                version = self._version
+                # 메모리의 배열은 바뀔 수 있으므로 복사, 파일의 배열은 위치만 기록 (mmap은 flush에서만 교체)
+                snapshot = []
+                for board, info in self.boards.items():
+                    tokens = []
+                    for token in set(info['tokens']) | set(self._file_boards.get(board, {})):
+                        postings = info['tokens'].get(token)
+                        if postings is not None:
+                            if postings:
+                                tokens.append((token, postings.tobytes(), len(postings)))
+                        else:
+                            tokens.append((token, self._file_boards[board][token], None))
+                    snapshot.append((board, info['max_id'], tokens))
+                old_mmap = self._mmap
+            
+            itemsize = array('I').itemsize
+            fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + '.', suffix='.tmp',
+                                             dir=os.path.dirname(os.path.abspath(self.path)))
+            header = {'itemsize': itemsize, 'boards': {}}
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(self.MAGIC)
+                    offset = len(self.MAGIC)
+                    for board, max_id, tokens in snapshot:
+                        locations = {}
+                        for token, data, count in tokens:
+                            if count is None:
+                                # 이전 파일의 배열을 그대로 복사
+                                file_offset, count = data
+                                data = old_mmap[file_offset:file_offset + count * itemsize]
+                            f.write(data)
+                            locations[token] = [offset, count]
+                            offset += len(data)
+                        header['boards'][board] = {'max_id': max_id, 'tokens': locations}
+                    header_data = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                    f.write(header_data)
+                    f.write(struct.pack('<QQ', offset, len(header_data)))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except Exception:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                raise
+            
+            with open(self.path, 'rb') as f:
+                new_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with self.lock:
+                if self._version != version:
+                    # 저장 중에 바뀐 내용은 메모리에 남아 있으므로 이전 파일을 계속 사용
+                    new_mmap.close()
+                    app.logger.info(f"Search index saved to {self.path} ({offset} bytes), changed while saving")
+                    return
+                # 저장한 파일을 사용하고 메모리에 읽어 둔 배열은 비움
+                if self._mmap is not None:
+                    self._mmap.close()
+                self._mmap = new_mmap
+                self._file_boards = {board: info['tokens'] for board, info in header['boards'].items()}
+                for info in self.boards.values():
+                    info['tokens'] = {}
+                self.dirty = False
+            app.logger.info(f"Search index saved to {self.path} ({offset} bytes)")
+
+search_index = SearchIndex(SEARCH_INDEX_PATH)
+        
+# 일반 게시판의 집계 키 (고객사 게시판은 테이블 이름을 키로 사용)
+GENERAL_BOARD = 'posts'
+
 def sanitize_table_name(name):
     """테이블 이름을 안전하게 만들기 (SQL 인젝션 방지)"""
     # 특수문자 제거, 소문자로 변환, 언더스코어로 공백 대체
@@ -444,12 +2343,229 @@ def sanitize_table_name(name):
     # 테이블 이름 접두사 추가
     return f"customer_{sanitized}"
 
+class CustomerBoard:
+    """고객사 게시판의 저장 위치 (고객사별 테이블 또는 공용 customer_posts 테이블)"""
+
+    def __init__(self, customer_id, name, table_name, storage):
+        self.customer_id = customer_id
+        self.name = name
+        # 고객사 식별용 이름 (board_stats 집계 키로도 사용)
+        self.table_name = table_name
+        self.storage = storage
+        if self.shared:
+            self.posts_table = 'customer_posts'
+            self.files_table = 'customer_post_files'
+        else:
+            self.posts_table = table_name
+            self.files_table = f"{table_name}_files"
+
+    @property
+    def shared(self):
+        return self.storage == 'shared'
+
+    def scope(self, alias='p'):
+        """공용 테이블에서 이 고객사의 게시글만 고르는 조건 (조건 목록, 파라미터 목록)"""
+        if self.shared:
+            return [f"{alias}.customer_id = %s"], [self.customer_id]
+        return [], []
+
+    def insert_post(self, cursor, title, content):
+        """게시글 추가 후 새 게시글 ID 반환 (commit하지 않음)"""
+        if self.shared:
+            cursor.execute("""
+                INSERT INTO customer_posts (customer_id, title, content, summary)
+                VALUES (%s, %s, %s, %s)
+            """, (self.customer_id, title, content, make_summary(content)))
+        else:
+            cursor.execute(f"""
+                INSERT INTO {self.posts_table} (title, content, summary)
+                VALUES (%s, %s, %s)
+            """, (title, content, make_summary(content)))
+        return cursor.lastrowid
+
+class CustomerRegistry:
+    """고객사 이름 → CustomerBoard 메모리 캐시
+
+    customers 테이블 전체를 한 번에 읽어 두고, cache_versions 테이블의 'customers' 버전이
+    바뀐 경우에만 다시 읽는다. 버전 확인은 CUSTOMER_REGISTRY_CHECK_INTERVAL마다 한 번이므로
+    대부분의 조회는 DB 없이 딕셔너리 조회로 끝난다.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.boards = {}
+        self.version = None
+        self.checked_at = 0.0
+
+    @staticmethod
+    def _key(customer_name):
+        # customers.name은 대소문자를 구분하지 않는 collation(utf8mb4_unicode_ci)으로 비교됨
+        return customer_name.strip().casefold()
+
+    def get(self, customer_name):
+        """고객사 조회 (없으면 None)"""
+        if self.version is None or time.monotonic() - self.checked_at > CUSTOMER_REGISTRY_CHECK_INTERVAL:
+            self.sync()
+        board = self.boards.get(self._key(customer_name))
+        if board is None:
+            # 다른 인스턴스에서 방금 추가된 고객사일 수 있으므로 버전을 한 번 더 확인
+            self.sync(force=True)
+            board = self.boards.get(self._key(customer_name))
+        return board
+
+    def sync(self, force=False):
+        """DB의 버전이 캐시와 다르면 고객사 목록을 다시 읽음"""
+        loaded = self.version is not None
+        # 이미 로드된 상태에서 다른 스레드가 확인 중이면 기존 값 사용
+        if not self.lock.acquire(blocking=not loaded):
+            return
+        try:
+            if not force and self.version is not None and time.monotonic() - self.checked_at <= CUSTOMER_REGISTRY_CHECK_INTERVAL:
+                return
+            
+            with get_db_connection() as db:
+                cursor = db.cursor(dictionary=True)
+                cursor.execute("SELECT version FROM cache_versions WHERE name = 'customers'")
+                row = cursor.fetchone()
+                version = row['version'] if row else 0
+                
+                if version != self.version:
+                    cursor.execute("SELECT id, name, table_name, storage FROM customers")
+                    self.boards = {
+                        self._key(c['name']): CustomerBoard(c['id'], c['name'], c['table_name'], c['storage'])
+                        for c in cursor.fetchall()
+                    }
+                    self.version = version
+                    app.logger.info(f"Customer registry loaded: {len(self.boards)} customers (version {version})")
+                cursor.close()
+            
+            self.checked_at = time.monotonic()
+        except Exception as e:
+            if not loaded:
+                raise
+            # DB 확인에 실패해도 이전 목록으로 계속 응답
+            app.logger.warning(f"Customer registry check failed, using cached entries: {e}")
+            clear_db_rejection()
+        finally:
+            self.lock.release()
+
+    def all(self):
+        """모든 고객사 목록 (이름 순)"""
+        if self.version is None or time.monotonic() - self.checked_at > CUSTOMER_REGISTRY_CHECK_INTERVAL:
+            self.sync()
+        return sorted(self.boards.values(), key=lambda board: board.name)
+
+    def invalidate(self):
+        """이 인스턴스에서 고객사 정보를 변경한 경우 다음 조회 시 바로 다시 읽도록 표시"""
+        with self.lock:
+            self.version = None
+
+customer_registry = CustomerRegistry()
+
+def bump_customer_registry_version(cursor):
+    """고객사 정보 변경을 다른 인스턴스에 알림 (변경과 같은 트랜잭션에서 호출)"""
+    cursor.execute("""
+        INSERT INTO cache_versions (name, version) VALUES ('customers', 1)
+        ON DUPLICATE KEY UPDATE version = version + 1
+    """)
+
+def create_shared_customer_tables(cursor):
+    """모든 고객사가 함께 쓰는 게시글/파일 테이블 생성"""
+    if CUSTOMER_POSTS_PARTITIONS > 0:
+        # 파티션 테이블은 외래 키를 지원하지 않으므로 파일 삭제는 애플리케이션에서 처리
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS customer_posts (
+                id INT AUTO_INCREMENT,
+                customer_id INT NOT NULL,
+                title VARCHAR(255) NOT NULL,
+                content TEXT,
+                summary VARCHAR(200) NULL,
+                file_count INT NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (id, customer_id),
+                INDEX idx_customer_created (customer_id, created_at, id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            PARTITION BY KEY (customer_id) PARTITIONS {CUSTOMER_POSTS_PARTITIONS}
+        """)
+        posts_fk = ""
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS customer_posts (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                customer_id INT NOT NULL,
+                title VARCHAR(255) NOT NULL,
+                content TEXT,
+                summary VARCHAR(200) NULL,
+                file_count INT NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_customer_created (customer_id, created_at, id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+        posts_fk = "FOREIGN KEY (post_id) REFERENCES customer_posts(id) ON DELETE CASCADE,"
+    
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS customer_post_files (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            post_id INT NOT NULL,
+            file_name VARCHAR(255) NOT NULL,
+            original_file_name VARCHAR(255) NOT NULL,
+            file_size BIGINT,
+            blob_sha256 CHAR(64) NULL,
+            {posts_fk}
+            INDEX idx_post_id (post_id),
+            INDEX idx_blob (blob_sha256)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+    ensure_file_count_column(cursor, 'customer_posts', 'customer_post_files')
+    ensure_summary_column(cursor, 'customer_posts')
+    ensure_blob_column(cursor, 'customer_post_files')
+
+def ensure_pagination_index(cursor, table_name):
+    """목록 페이지 이동(created_at, id 순 keyset 조회)용 인덱스가 없으면 생성"""
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_created_id ON {table_name} (created_at, id)")
+
+def ensure_file_count_column(cursor, posts_table, files_table):
+    """기존 설치본: file_count 컬럼이 없으면 추가하고 현재 첨부 파일 수로 채움"""
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s AND column_name = 'file_count'
+    """, (DB_CONFIG['database'], posts_table))
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"ALTER TABLE {posts_table} ADD COLUMN file_count INT NOT NULL DEFAULT 0")
+        recount_file_counts(cursor, posts_table, files_table)
+        app.logger.info(f"Added file_count column to {posts_table}")
+
+def ensure_summary_column(cursor, posts_table):
+    """기존 설치본: summary 컬럼이 없으면 추가 (기존 글은 NULL로 두고 backfill-post-summaries로 채움)"""
+    cursor.execute(f"ALTER TABLE {posts_table} ADD COLUMN IF NOT EXISTS summary VARCHAR(200) NULL AFTER content")
+
+def ensure_blob_column(cursor, files_table):
+    """기존 설치본: 첨부 파일 테이블에 blob_sha256 컬럼 추가 (기존 파일은 NULL, migrate-attachment-blobs로 전환)"""
+    cursor.execute(f"ALTER TABLE {files_table} ADD COLUMN IF NOT EXISTS blob_sha256 CHAR(64) NULL AFTER file_size")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_blob ON {files_table} (blob_sha256)")
+
+def recount_file_counts(cursor, posts_table, files_table):
+    """게시글별 file_count를 첨부 파일 테이블로부터 다시 계산 (commit하지 않음)"""
+    cursor.execute(f"""
+        UPDATE {posts_table} p
+        SET p.file_count = (SELECT COUNT(*) FROM {files_table} pf WHERE pf.post_id = p.id)
+    """)
+
 def create_customer_table(customer_name, db):
-    """고객사 테이블 생성"""
+    """고객사 테이블 생성 (공용 저장 방식이면 고객사 정보만 추가)"""
     table_name = sanitize_table_name(customer_name)
     
     cursor = db.cursor()
     
+    if CUSTOMER_STORAGE_MODE == 'shared':
+        cursor.execute("""
+            INSERT INTO customers (name, table_name, storage, created_at)
+            VALUES (%s, %s, 'shared', NOW())
+        """, (customer_name, table_name))
+        cursor.close()
+        return table_name
+    
     # 테이블이 이미 존재하는지 확인
     cursor.execute(f"""
         SELECT COUNT(*)
@@ -468,7 +2584,10 @@ def create_customer_table(customer_name, db):
             id INT AUTO_INCREMENT PRIMARY KEY,
             title VARCHAR(255) NOT NULL,
             content TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            summary VARCHAR(200) NULL,
+            file_count INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_created_id (created_at, id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
     """)
     
@@ -480,11 +2599,16 @@ def create_customer_table(customer_name, db):
             file_name VARCHAR(255) NOT NULL,
             original_file_name VARCHAR(255) NOT NULL,
             file_size BIGINT,
+            blob_sha256 CHAR(64) NULL,
             FOREIGN KEY (post_id) REFERENCES {table_name}(id) ON DELETE CASCADE,
-            INDEX idx_post_id (post_id)
+            INDEX idx_post_id (post_id),
+            INDEX idx_blob (blob_sha256)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
     """)
     
+    # 검색용 FULLTEXT 인덱스 생성
+    ensure_fulltext_index(cursor, table_name)
+    
     # 고객사 정보 테이블에 추가
     cursor.execute("""
         INSERT INTO customers (name, table_name, created_at)
@@ -494,37 +2618,32 @@ def create_customer_table(customer_name, db):
     cursor.close()
     return table_name
 
-def get_customer_table_name(customer_name):
-    """고객사 이름으로 테이블 이름 조회"""
+def get_customer_board(customer_name):
+    """고객사 이름으로 게시판 저장 위치 조회 (없으면 None) - customer_registry 캐시 사용"""
     try:
-        with get_db_connection() as db:
-            cursor = db.cursor()
-            cursor.execute("""
-                SELECT table_name FROM customers WHERE name = %s
-            """, (customer_name,))
-            result = cursor.fetchone()
-            cursor.close()
-            
-            if result:
-                return result[0]
-            else:
-                return None
+        return customer_registry.get(customer_name)
     except Exception as e:
-        app.logger.error(f"Error getting customer table name: {e}")
+        app.logger.error(f"Error getting customer board: {e}")
         return None
 
+def customer_post_query(board, post_id):
+    """고객사 게시글 한 건 조회 쿼리와 파라미터"""
+    scope_conditions, scope_params = board.scope('p')
+    where_clause = " AND ".join(["p.id = %s"] + scope_conditions)
+    return f"SELECT p.* FROM {board.posts_table} p WHERE {where_clause}", (post_id, *scope_params)
+
 def get_customer_files(post_id, customer_name):
     """고객사 게시글의 첨부 파일 목록을 가져옴"""
-    table_name = get_customer_table_name(customer_name)
-    if not table_name:
+    board = get_customer_board(customer_name)
+    if not board:
         return []
     
     try:
         with get_db_connection() as db:
             cursor = db.cursor(dictionary=True)
             cursor.execute(f"""
-                SELECT id, file_name, original_file_name, file_size 
-                FROM {table_name}_files 
+                SELECT id, file_name, original_file_name, file_size, blob_sha256
+                FROM {board.files_table} 
                 WHERE post_id = %s 
                 ORDER BY id
             """, (post_id,))
@@ -537,8 +2656,8 @@ def get_customer_files(post_id, customer_name):
 
 def save_customer_files(post_id, customer_name, files, db):
     """고객사 게시글의 첨부 파일들을 저장"""
-    table_name = get_customer_table_name(customer_name)
-    if not table_name:
+    board = get_customer_board(customer_name)
+    if not board:
         raise ValueError(f"Customer table not found for {customer_name}")
     
     saved_files = []
@@ -556,66 +2675,390 @@ def save_customer_files(post_id, customer_name, files, db):
             else:
                 file_size = get_file_size(file)
             
-            # 고유한 파일명 생성
-            unique_filename = str(uuid.uuid4()) + os.path.splitext(file.filename)[1]
-            
             try:
-                # 파일 저장
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                file.save(file_path)
+                # 같은 내용의 파일이 이미 저장되어 있으면 참조 수만 늘리고 다시 쓰지 않음
+                sha256 = upload_sha256(file)
+                file_name, is_new = acquire_blob(db, sha256, file_size)
+                if is_new:
+                    store_upload(file, upload_path(file_name))
                 
                 # 데이터베이스에 파일 정보 저장
                 cursor.execute(f"""
-                    INSERT INTO {table_name}_files (post_id, file_name, original_file_name, file_size)
-                    VALUES (%s, %s, %s, %s)
-                """, (post_id, unique_filename, original_filename, file_size))
+                    INSERT INTO {board.files_table} (post_id, file_name, original_file_name, file_size, blob_sha256)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (post_id, file_name, original_filename, file_size, sha256))
                 
                 saved_files.append({
-                    'file_name': unique_filename,
+                    'file_name': file_name,
                     'original_file_name': original_filename,
-                    'file_size': file_size
+                    'file_size': file_size,
+                    'is_new': is_new
                 })
                 
-                app.logger.info(f"Customer file saved: {unique_filename} (original: {original_filename})")
+                app.logger.info(f"Customer file saved: {file_name} (original: {original_filename}, "
+                                f"{'new' if is_new else 'deduplicated'})")
                 
             except Exception as file_error:
                 app.logger.error(f"Failed to save customer file {original_filename}: {file_error}")
                 for saved_file in saved_files:
+                    if not saved_file['is_new']:
+                        continue
                     try:
-                        os.remove(os.path.join(app.config['UPLOAD_FOLDER'], saved_file['file_name']))
+                        remove_upload(saved_file['file_name'])
                     except:
                         pass
                 raise file_error
     
+    adjust_file_count(cursor, board.posts_table, post_id, len(saved_files))
     cursor.close()
     return saved_files
 
-def delete_customer_files(post_id, customer_name):
-    """고객사 게시글의 모든 첨부 파일을 삭제"""
-    table_name = get_customer_table_name(customer_name)
-    if not table_name:
-        return
+def delete_customer_files(post_id, customer_name, db):
+    """고객사 게시글의 모든 첨부 파일 레코드 삭제 (호출한 쪽의 트랜잭션 안에서 실행, commit하지 않음)
+
+    더 이상 참조되지 않는 저장 파일명 목록을 반환하며, 호출한 쪽이 commit 후 remove_released_files로 지운다.
+    """
+    board = get_customer_board(customer_name)
+    if not board:
+        return []
+    
+    files = get_customer_files(post_id, customer_name)
+    released = release_blobs(db, files)
+    cursor = db.cursor()
+    cursor.execute(f"DELETE FROM {board.files_table} WHERE post_id = %s", (post_id,))
+    cursor.execute(f"UPDATE {board.posts_table} SET file_count = 0 WHERE id = %s", (post_id,))
+    cursor.close()
+    return released
+
+def update_board_stats(cursor, board, delta, month=None):
+    """게시판 집계 테이블 갱신 (호출한 쪽의 트랜잭션 안에서 실행, commit하지 않음)
+
+    month가 없으면 현재 월(DB 기준)에 반영한다.
+    """
+    if month:
+        cursor.execute("""
+            INSERT INTO board_stats (board, month, post_count)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE post_count = post_count + VALUES(post_count)
+        """, (board, month, delta))
+    else:
+        cursor.execute("""
+            INSERT INTO board_stats (board, month, post_count)
+            VALUES (%s, DATE_FORMAT(NOW(), '%%Y-%%m'), %s)
+            ON DUPLICATE KEY UPDATE post_count = post_count + VALUES(post_count)
+        """, (board, delta))
+
+def adjust_file_count(cursor, posts_table, post_id, delta):
+    """게시글의 첨부 파일 수(file_count) 갱신 (호출한 쪽의 트랜잭션 안에서 실행, commit하지 않음)"""
+    if delta:
+        cursor.execute(f"""
+            UPDATE {posts_table} SET file_count = GREATEST(file_count + %s, 0) WHERE id = %s
+        """, (delta, post_id))
+
+def rebuild_board_stats(db):
+    """게시판 집계 테이블을 실제 게시글로부터 다시 계산"""
+    cursor = db.cursor()
+    
+    cursor.execute("SELECT table_name FROM customers WHERE storage = 'table'")
+    boards = [GENERAL_BOARD] + [row[0] for row in cursor.fetchall()]
+    
+    cursor.execute("DELETE FROM board_stats")
+    for board in boards:
+        cursor.execute(f"""
+            INSERT INTO board_stats (board, month, post_count)
+            SELECT %s, DATE_FORMAT(created_at, '%%Y-%%m'), COUNT(*)
+            FROM {board}
+            GROUP BY DATE_FORMAT(created_at, '%%Y-%%m')
+        """, (board,))
+    
+    # 공용 테이블에 저장된 고객사 게시글
+    cursor.execute("""
+        INSERT INTO board_stats (board, month, post_count)
+        SELECT c.table_name, DATE_FORMAT(p.created_at, '%Y-%m'), COUNT(*)
+        FROM customer_posts p
+        JOIN customers c ON c.id = p.customer_id
+        GROUP BY c.table_name, DATE_FORMAT(p.created_at, '%Y-%m')
+    """)
+    
+    db.commit()
+    cursor.close()
+    app.logger.info(f"Board stats rebuilt for {len(boards)} boards")
+
+@app.cli.command('rebuild-board-stats')
+def rebuild_board_stats_command():
+    """게시판 집계 테이블 재생성 (flask --app app rebuild-board-stats)"""
+    ensure_db_pool()
+    with get_db_connection() as db:
+        rebuild_board_stats(db)
+
+def repair_post_counters(db):
+    """게시판별 글 수(board_stats)와 게시글별 file_count를 실제 데이터로 다시 계산"""
+    rebuild_board_stats(db)
+    
+    cursor = db.cursor()
+    cursor.execute("SELECT table_name FROM customers WHERE storage = 'table'")
+    tables = [('posts', 'post_files'), ('customer_posts', 'customer_post_files')]
+    tables += [(row[0], f"{row[0]}_files") for row in cursor.fetchall()]
+    
+    for posts_table, files_table in tables:
+        recount_file_counts(cursor, posts_table, files_table)
+        db.commit()
+        app.logger.info(f"File counts recomputed for {posts_table} ({cursor.rowcount} posts changed)")
+    cursor.close()
+
+@app.cli.command('repair-post-counters')
+def repair_post_counters_command():
+    """게시글 수/첨부 파일 수 집계 복구 (flask --app app repair-post-counters)"""
+    ensure_db_pool()
+    with get_db_connection() as db:
+        repair_post_counters(db)
+
+def backfill_post_summaries(db, batch_size=500):
+    """summary가 비어 있는 기존 게시글의 목록용 요약을 배치 단위로 채움"""
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT table_name FROM customers WHERE storage = 'table'")
+    tables = ['posts', 'customer_posts'] + [row['table_name'] for row in cursor.fetchall()]
+    
+    for posts_table in tables:
+        filled = 0
+        while True:
+            cursor.execute(f"SELECT id, content FROM {posts_table} WHERE summary IS NULL LIMIT %s", (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            cursor.executemany(f"UPDATE {posts_table} SET summary=%s WHERE id=%s",
+                               [(make_summary(row['content']), row['id']) for row in rows])
+            db.commit()
+            filled += len(rows)
+        app.logger.info(f"Summaries backfilled for {posts_table} ({filled} posts)")
+    cursor.close()
+
+@app.cli.command('backfill-post-summaries')
+def backfill_post_summaries_command():
+    """기존 게시글의 목록용 요약(summary) 채우기 (flask --app app backfill-post-summaries)"""
+    ensure_db_pool()
+    with get_db_connection() as db:
+        backfill_post_summaries(db)
+
+def create_fulltext_indexes(db):
+    """모든 게시글 테이블에 검색용 FULLTEXT 인덱스 생성 (이미 있는 테이블은 건너뜀)"""
+    cursor = db.cursor()
+    cursor.execute("SELECT table_name FROM customers WHERE storage = 'table'")
+    tables = ['posts', 'customer_posts'] + [row[0] for row in cursor.fetchall()]
+    
+    for posts_table in tables:
+        ensure_fulltext_index(cursor, posts_table)
+    cursor.close()
+
+@app.cli.command('create-search-indexes')
+def create_search_indexes_command():
+    """검색용 FULLTEXT 인덱스 생성 (flask --app app create-search-indexes, SEARCH_MODE=fulltext일 때)"""
+    if SEARCH_MODE != 'fulltext':
+        app.logger.warning(f"SEARCH_MODE is {SEARCH_MODE}, FULLTEXT indexes are not used")
+        return
+    ensure_db_pool()
+    with get_db_connection() as db:
+        create_fulltext_indexes(db)
+
+def migrate_files_to_blobs(db):
+    """blob으로 저장되지 않은 기존 첨부 파일을 SHA-256 blob으로 전환하고 같은 내용의 중복 파일 삭제"""
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT table_name FROM customers WHERE storage = 'table'")
+    tables = ['post_files', 'customer_post_files'] + [f"{row['table_name']}_files" for row in cursor.fetchall()]
+    
+    for files_table in tables:
+        cursor.execute(f"SELECT id, file_name FROM {files_table} WHERE blob_sha256 IS NULL ORDER BY id")
+        migrated = removed = 0
+        for file_info in cursor.fetchall():
+            file_path = os.path.join(app.config['UPLOAD_FOLDER'], find_upload(file_info['file_name']) or file_info['file_name'])
+            try:
+                with open(file_path, 'rb') as f:
+                    sha256 = file_sha256(f)
+                file_size = os.path.getsize(file_path)
+            except OSError as e:
+                app.logger.warning(f"Skipping {files_table} #{file_info['id']}: {e}")
+                continue
+            
+            file_name, is_new = acquire_blob(db, sha256, file_size)
+            blob_path = upload_path(file_name)
+            cursor.execute(f"UPDATE {files_table} SET file_name = %s, blob_sha256 = %s WHERE id = %s",
+                           (file_name, sha256, file_info['id']))
+            if is_new:
+                os.replace(file_path, blob_path)
+                try:
+                    db.commit()
+                except Exception:
+                    os.replace(blob_path, file_path)
+                    raise
+            else:
+                db.commit()
+                if file_path != blob_path:
+                    os.remove(file_path)
+                    removed += 1
+            migrated += 1
+        app.logger.info(f"Attachments moved to blobs for {files_table} ({migrated} files, {removed} duplicates removed)")
+    cursor.close()
+
+@app.cli.command('migrate-attachment-blobs')
+def migrate_attachment_blobs_command():
+    """기존 첨부 파일을 내용 기준(SHA-256) 저장소로 전환 (flask --app app migrate-attachment-blobs)"""
+    ensure_db_pool()
+    init_database()
+    with get_db_connection() as db:
+        migrate_files_to_blobs(db)
+
+def migrate_upload_layout(batch_size=1000, pause=0.0):
+    """UPLOAD_FOLDER 최상위의 기존 파일을 ab/cd/ 하위 디렉터리 배치로 옮김 (서비스 중에 실행 가능)
+
+    파일 하나씩 같은 파일시스템 안에서 rename하며, 읽기/삭제는 두 배치를 모두 확인하므로 중단 없이 진행된다.
+    batch_size개마다 진행 상황을 남기고 pause초 쉰다. 옮긴 파일 수 반환.
+    """
+    moved = 0
+    with os.scandir(app.config['UPLOAD_FOLDER']) as entries:
+        for entry in entries:
+            if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                continue
+            relpath = upload_relpath(entry.name)
+            if relpath == entry.name:
+                continue
+            try:
+                os.replace(entry.path, upload_path(entry.name))
+            except FileNotFoundError:
+                continue  # 그 사이 삭제된 파일
+            moved += 1
+            if moved % batch_size == 0:
+                app.logger.info(f"Upload layout migration: {moved} files moved")
+                if pause:
+                    time.sleep(pause)
+    app.logger.info(f"Upload layout migration finished: {moved} files moved")
+    return moved
+
+@app.cli.command('migrate-upload-layout')
+@click.option('--batch-size', default=1000, help='진행 상황을 기록할 파일 수 단위')
+@click.option('--pause', default=0.0, help='배치마다 쉬는 시간(초), NAS 부하 조절용')
+def migrate_upload_layout_command(batch_size, pause):
+    """기존 첨부 파일/이미지를 하위 디렉터리 배치로 이동 (flask --app app migrate-upload-layout)"""
+    migrate_upload_layout(batch_size, pause)
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """내장 검색 색인 재생성 (flask --app app rebuild-search-index)"""
+    ensure_db_pool()
+    with get_db_connection() as db:
+        search_index.rebuild(db, GENERAL_BOARD, 'posts')
+        
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("SELECT id, name, table_name, storage FROM customers ORDER BY id")
+        customers = cursor.fetchall()
+        cursor.close()
+        for customer in customers:
+            board = CustomerBoard(customer['id'], customer['name'], customer['table_name'], customer['storage'])
+            search_index.rebuild(db, board.table_name, board.posts_table, board.scope())
+    
+    search_index.dirty = True
+    search_index.flush()
+
+def _copy_customer_rows(cursor, board, posts, files, post_ids):
+    """고객사별 테이블의 게시글/파일 행을 공용 테이블로 복사 (commit하지 않음)
+
+    post_ids(기존 게시글 ID → 새 ID)를 갱신하며, 이미 복사한 게시글에 나중에 추가된 파일도 옮긴다.
+    """
+    files_by_post = {}
+    for file_info in files:
+        files_by_post.setdefault(file_info['post_id'], []).append(file_info)
     
-    try:
-        files = get_customer_files(post_id, customer_name)
+    for post in posts:
+        cursor.execute("""
+            INSERT INTO customer_posts (customer_id, title, content, summary, file_count, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (board.customer_id, post['title'], post['content'], make_summary(post['content']),
+              len(files_by_post.get(post['id'], [])), post['created_at']))
+        post_ids[post['id']] = cursor.lastrowid
+    
+    new_posts = {post['id'] for post in posts}
+    for old_post_id, post_files in files_by_post.items():
+        new_post_id = post_ids.get(old_post_id)
+        if new_post_id is None:
+            continue
+        for file_info in post_files:
+            cursor.execute("""
+                INSERT INTO customer_post_files (post_id, file_name, original_file_name, file_size, blob_sha256)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (new_post_id, file_info['file_name'], file_info['original_file_name'], file_info['file_size'],
+                  file_info['blob_sha256']))
+        if old_post_id not in new_posts:
+            adjust_file_count(cursor, 'customer_posts', new_post_id, len(post_files))
+
+def migrate_customer_to_shared(board):
+    """고객사 하나를 고객사별 테이블에서 공용 customer_posts 테이블로 이전
+
+    고객사 단위로 한 트랜잭션에서 복사하며, 복사하는 동안만 해당 고객사의 쓰기가 잠긴다.
+    잠금을 풀기 전에 기존 테이블을 <table>_premigration 이름으로 바꾸고, 그 사이에 들어온 글/파일은
+    이름을 바꾼 뒤 다시 확인해 옮긴다. 게시글/파일 ID는 새로 발급되며(첨부 파일 자체는 그대로)
+    이전한 게시글 수를 반환.
+    """
+    with get_db_connection() as db:
+        cursor = db.cursor(dictionary=True)
         
-        for file_info in files:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], file_info['file_name'])
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    app.logger.info(f"Customer file deleted: {file_path}")
-                except Exception as file_error:
-                    app.logger.warning(f"Failed to delete customer file {file_path}: {file_error}")
+        # 복사 중 새 글/파일이 기존 테이블에 쓰이지 않도록 잠금
+        cursor.execute(f"SELECT id, title, content, created_at FROM {board.posts_table} ORDER BY id FOR UPDATE")
+        posts = cursor.fetchall()
+        cursor.execute(f"SELECT id, post_id, file_name, original_file_name, file_size, blob_sha256 FROM {board.files_table} ORDER BY id FOR UPDATE")
+        files = cursor.fetchall()
         
-        with get_db_connection() as db:
-            cursor = db.cursor()
-            cursor.execute(f"DELETE FROM {table_name}_files WHERE post_id = %s", (post_id,))
+        post_ids = {}
+        _copy_customer_rows(cursor, board, posts, files, post_ids)
+        max_post_id = posts[-1]['id'] if posts else 0
+        max_file_id = files[-1]['id'] if files else 0
+        
+        cursor.execute("UPDATE customers SET storage = 'shared' WHERE id = %s", (board.customer_id,))
+        bump_customer_registry_version(cursor)
+        
+        # 기존 테이블 보관 (이후 잘못 들어오는 쓰기는 실패하도록 이름 변경)
+        # RENAME TABLE은 암묵적으로 commit하므로 잠금을 푸는 마지막 문장으로 실행하고, 위의 복사도 함께 반영된다.
+        cursor.execute(f"""
+            RENAME TABLE {board.posts_table} TO {board.posts_table}_premigration,
+                         {board.files_table} TO {board.files_table}_premigration
+        """)
+        customer_registry.invalidate()
+        # 게시글 ID가 바뀌었으므로 다음 검색 때 다시 색인
+        search_index.drop_board(board.table_name)
+        
+        # commit과 이름 변경 사이에 기존 테이블에 들어온 글/파일 옮기기
+        cursor.execute(f"SELECT id, title, content, created_at FROM {board.posts_table}_premigration WHERE id > %s ORDER BY id",
+                       (max_post_id,))
+        late_posts = cursor.fetchall()
+        cursor.execute(f"SELECT id, post_id, file_name, original_file_name, file_size, blob_sha256 FROM {board.files_table}_premigration WHERE id > %s ORDER BY id",
+                       (max_file_id,))
+        late_files = cursor.fetchall()
+        if late_posts or late_files:
+            _copy_customer_rows(cursor, board, late_posts, late_files, post_ids)
             db.commit()
-            cursor.close()
-                
-    except Exception as e:
-        app.logger.error(f"Error deleting customer files for post {post_id}: {e}")
+            app.logger.warning(f"Customer {board.name}: moved {len(late_posts)} posts and {len(late_files)} files "
+                               f"written during migration")
+        cursor.close()
+    
+    return len(posts) + len(late_posts)
+
+@app.cli.command('migrate-customer-storage')
+def migrate_customer_storage_command():
+    """고객사별 테이블을 공용 customer_posts 테이블로 이전 (flask --app app migrate-customer-storage)"""
+    ensure_db_pool()
+    init_database()
+    
+    with get_db_connection() as db:
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("SELECT id, name, table_name, storage FROM customers WHERE storage = 'table' ORDER BY id")
+        customers = cursor.fetchall()
+        cursor.close()
+    
+    for customer in customers:
+        board = CustomerBoard(customer['id'], customer['name'], customer['table_name'], customer['storage'])
+        try:
+            migrated = migrate_customer_to_shared(board)
+            app.logger.info(f"Migrated customer {board.name}: {migrated} posts moved to customer_posts")
+        except Exception as e:
+            app.logger.error(f"Failed to migrate customer {board.name}: {e}")
 
 def init_database():
     """데이터베이스 초기화 (필요한 테이블 생성)"""
@@ -631,9 +3074,14 @@ def init_database():
                     id INT AUTO_INCREMENT PRIMARY KEY,
                     title VARCHAR(255) NOT NULL,
                     content TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    summary VARCHAR(200) NULL,
+                    file_count INT NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_created_id (created_at, id)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
+            # 기존 설치본: 목록 페이지 이동용 인덱스 추가
+            ensure_pagination_index(cursor, 'posts')
             
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS post_files (
@@ -642,10 +3090,26 @@ def init_database():
                     file_name VARCHAR(255) NOT NULL,
                     original_file_name VARCHAR(255) NOT NULL,
                     file_size BIGINT,
+                    blob_sha256 CHAR(64) NULL,
                     FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE,
-                    INDEX idx_post_id (post_id)
+                    INDEX idx_post_id (post_id),
+                    INDEX idx_blob (blob_sha256)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+            ensure_blob_column(cursor, 'post_files')
+            
+            # 첨부 파일 내용(SHA-256)별 실제 저장 파일과 참조 수
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS file_blobs (
+                    sha256 CHAR(64) PRIMARY KEY,
+                    file_name VARCHAR(255) NOT NULL,
+                    file_size BIGINT,
+                    ref_count INT NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
+            ensure_file_count_column(cursor, 'posts', 'post_files')
+            ensure_summary_column(cursor, 'posts')
             
             # 고객사 관리 테이블 생성
             cursor.execute("""
@@ -653,161 +3117,382 @@ def init_database():
                     id INT AUTO_INCREMENT PRIMARY KEY,
                     name VARCHAR(100) NOT NULL UNIQUE,
                     table_name VARCHAR(100) NOT NULL UNIQUE,
+                    storage VARCHAR(10) NOT NULL DEFAULT 'table',
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     INDEX idx_name (name)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
+            # 기존 설치본: 고객사별 저장 방식 컬럼 추가 (table: 고객사별 테이블, shared: 공용 테이블)
+            cursor.execute("""
+                ALTER TABLE customers ADD COLUMN IF NOT EXISTS storage VARCHAR(10) NOT NULL DEFAULT 'table'
+            """)
+            
+            # 기존 고객사별 게시글 테이블에 페이지 이동용 인덱스와 file_count/summary 컬럼 추가
+            cursor.execute("SELECT table_name FROM customers WHERE storage = 'table'")
+            for (customer_table,) in cursor.fetchall():
+                ensure_pagination_index(cursor, customer_table)
+                ensure_file_count_column(cursor, customer_table, f"{customer_table}_files")
+                ensure_summary_column(cursor, customer_table)
+                ensure_blob_column(cursor, f"{customer_table}_files")
+            
+            # 공용 고객사 게시글 테이블 생성
+            create_shared_customer_tables(cursor)
+            
+            # 메모리 캐시 동기화용 버전 번호 (name: 캐시 이름, 변경 시 version 증가)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS cache_versions (
+                    name VARCHAR(50) PRIMARY KEY,
+                    version BIGINT NOT NULL DEFAULT 0
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+            
+            # 게시판별/월별 게시글 수 집계 테이블 (board: 게시글 테이블 이름, month: YYYY-MM)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS board_stats (
+                    board VARCHAR(100) NOT NULL,
+                    month CHAR(7) NOT NULL,
+                    post_count INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (board, month)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
             
             db.commit()
+            
+            # 집계 테이블이 비어 있으면 기존 게시글로 채움 (최초 배포 시)
+            cursor.execute("SELECT COUNT(*) FROM board_stats")
+            if cursor.fetchone()[0] == 0:
+                rebuild_board_stats(db)
+            
             cursor.close()
             
             app.logger.info("Database tables initialized successfully")
+        
+        # 고객사 정보 캐시 미리 로드
+        customer_registry.sync(force=True)
             
     except Exception as e:
         app.logger.error(f"Database initialization error: {e}")
 
 # ==================== 라우트 추가 ====================
 
+def load_dashboard_stats(read_only=True):
+    """대시보드 통계 계산 (dashboard_cache의 loader, 쓰기 직후에는 read_only=False로 기본 DB에서 읽음)"""
+    with get_db_connection(read_only=read_only) as db:
+        cursor = db.cursor(dictionary=True)
+        
+        # 고객사 목록 가져오기
+        cursor.execute("SELECT name, table_name FROM customers ORDER BY created_at DESC")
+        customers = cursor.fetchall()
+        
+        # 통계 정보
+        cursor.execute("SELECT COUNT(*) as total FROM post_files")
+        total_files = cursor.fetchone()['total']
+        
+        # 게시판별 게시글 수 (집계 테이블)
+        cursor.execute("SELECT board, SUM(post_count) as count FROM board_stats GROUP BY board")
+        board_counts = {row['board']: int(row['count']) for row in cursor.fetchall()}
+        total_posts = board_counts.get(GENERAL_BOARD, 0)
+        
+        # 고객사별 게시글 수 (파이 차트용)
+        customer_post_counts = [
+            {'name': customer['name'], 'count': board_counts.get(customer['table_name'], 0)}
+            for customer in customers
+        ]
+        
+        # 월별 게시글 수 (전체 게시판 합계)
+        cursor.execute("SELECT month, SUM(post_count) as count FROM board_stats GROUP BY month ORDER BY month")
+        month_counts = [(row['month'], int(row['count'])) for row in cursor.fetchall()]
+        
+        # 최근 12개월 목록 생성
+        current_date = datetime.now()
+        months = []
+        for i in range(11, -1, -1):
+            month_date = current_date - timedelta(days=30*i)
+            month_str = month_date.strftime('%Y-%m')
+            months.append(month_str)
+        
+        # 월별 신규 게시글 수 및 누적 게시글 수 계산
+        new_posts_by_month = dict(month_counts)
+        new_posts_counts = [new_posts_by_month.get(month, 0) for month in months]
+        cumulative_counts = [
+            sum(count for m, count in month_counts if m <= month)
+            for month in months
+        ]
+        
+        monthly_data = {
+            'months': [m.split('-')[1] + '월' for m in months],
+            'cumulative': cumulative_counts,
+            'new_posts': new_posts_counts
+        }
+        
+        cursor.close()
+    
+    return {
+        'customers': customers,
+        'total_posts': total_posts,
+        'total_files': total_files,
+        'customer_post_counts': customer_post_counts,
+        'monthly_data': monthly_data
+    }
+
+# 대시보드 통계 캐시 (쓰기 요청 시 dirty 표시, TTL 경과 시 백그라운드 갱신)
+dashboard_cache = SnapshotCache('dashboard', load_dashboard_stats, DASHBOARD_CACHE_TTL)
+
 @app.route('/dashboard')
 @login_required
+@read_replica
 def dashboard():
     """대시보드 페이지"""
     try:
         ensure_db_pool()
         
+        # 차트/통계 데이터는 페이지가 /api/dashboard/stats에서 비동기로 가져옴
         with get_db_connection() as db:
             cursor = db.cursor(dictionary=True)
-            
-            # 고객사 목록 가져오기
             cursor.execute("SELECT name FROM customers ORDER BY created_at DESC")
             customers = cursor.fetchall()
-            
-            # 통계 정보
-            cursor.execute("SELECT COUNT(*) as total FROM posts")
-            total_posts = cursor.fetchone()['total']
-            
-            cursor.execute("SELECT COUNT(*) as total FROM post_files")
-            total_files = cursor.fetchone()['total']
-            
-            # 고객사별 게시글 수 (파이 차트용)
-            customer_post_counts = []
-            for customer in customers:
-                table_name = sanitize_table_name(customer['name'])
-                try:
-                    cursor.execute(f"SELECT COUNT(*) as count FROM {table_name}")
-                    count = cursor.fetchone()['count']
-                    customer_post_counts.append({
-                        'name': customer['name'],
-                        'count': count
-                    })
-                except Exception as e:
-                    app.logger.error(f"Error counting posts for {customer['name']}: {e}")
-                    customer_post_counts.append({
-                        'name': customer['name'],
-                        'count': 0
-                    })
-            
-            # 월별 게시글 추이 데이터 (최근 12개월)
-            monthly_data = []
-            
-            # 일반 게시판 월별 데이터
-            cursor.execute("""
-                SELECT 
-                    DATE_FORMAT(created_at, '%Y-%m') as month,
-                    COUNT(*) as count
-                FROM posts
-                WHERE created_at >= DATE_SUB(NOW(), INTERVAL 12 MONTH)
-                GROUP BY DATE_FORMAT(created_at, '%Y-%m')
-                ORDER BY month
-            """)
-            general_monthly = {row['month']: row['count'] for row in cursor.fetchall()}
-            
-            # 고객사별 월별 데이터
-            customer_monthly = {}
-            for customer in customers:
-                table_name = sanitize_table_name(customer['name'])
-                try:
-                    cursor.execute(f"""
-                        SELECT 
-                            DATE_FORMAT(created_at, '%Y-%m') as month,
-                            COUNT(*) as count
-                        FROM {table_name}
-                        WHERE created_at >= DATE_SUB(NOW(), INTERVAL 12 MONTH)
-                        GROUP BY DATE_FORMAT(created_at, '%Y-%m')
-                        ORDER BY month
-                    """)
-                    customer_monthly[customer['name']] = {row['month']: row['count'] for row in cursor.fetchall()}
-                except Exception as e:
-                    app.logger.error(f"Error getting monthly data for {customer['name']}: {e}")
-                    customer_monthly[customer['name']] = {}
-            
-            # 최근 12개월 목록 생성
-            from datetime import datetime, timedelta
-            current_date = datetime.now()
-            months = []
-            for i in range(11, -1, -1):
-                month_date = current_date - timedelta(days=30*i)
-                month_str = month_date.strftime('%Y-%m')
-                months.append(month_str)
-            
-            # 월별 전체 게시글 수 계산
-            cumulative_counts = []
-            new_posts_counts = []
-            
-            for month in months:
-                # 해당 월의 신규 게시글 수
-                new_count = general_monthly.get(month, 0)
-                for customer_data in customer_monthly.values():
-                    new_count += customer_data.get(month, 0)
-                new_posts_counts.append(new_count)
-                
-                # 해당 월까지의 누적 게시글 수
-                month_end = month + '-31'
-                cursor.execute(f"""
-                    SELECT COUNT(*) as count 
-                    FROM posts 
-                    WHERE created_at <= '{month_end}'
-                """)
-                cumulative = cursor.fetchone()['count']
-                
-                for customer in customers:
-                    table_name = sanitize_table_name(customer['name'])
-                    try:
-                        cursor.execute(f"""
-                            SELECT COUNT(*) as count 
-                            FROM {table_name} 
-                            WHERE created_at <= '{month_end}'
-                        """)
-                        cumulative += cursor.fetchone()['count']
-                    except:
-                        pass
-                
-                cumulative_counts.append(cumulative)
-            
-            monthly_data = {
-                'months': [m.split('-')[1] + '월' for m in months],
-                'cumulative': cumulative_counts,
-                'new_posts': new_posts_counts
-            }
-            
             cursor.close()
         
-        return render_template('dashboard.html', 
-                             customers=customers,
-                             total_posts=total_posts,
-                             total_files=total_files,
-                             customer_post_counts=customer_post_counts,
-                             monthly_data=monthly_data)
+        return render_template('dashboard.html', customers=customers)
         
     except Exception as e:
         app.logger.error(f"Error loading dashboard: {e}")
         flash("대시보드를 불러오는 중 오류가 발생했습니다.")
-        return render_template('dashboard.html', 
-                             customers=[], 
-                             total_posts=0, 
-                             total_files=0,
-                             customer_post_counts=[],
-                             monthly_data={'months': [], 'cumulative': [], 'new_posts': []})
+        return render_template('dashboard.html', customers=[])
+
+@app.route('/api/dashboard/stats')
+@login_required
+@read_replica
+def api_dashboard_stats():
+    """API: 대시보드 통계/차트 데이터 (ETag 지원, 변경이 없으면 304)"""
+    try:
+        ensure_db_pool()
+        stats, etag = dashboard_cache.get_with_etag()
+    except Exception as e:
+        app.logger.error(f"Error loading dashboard stats: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = jsonify({
+            'customer_count': len(stats['customers']),
+            'total_posts': stats['total_posts'],
+            'total_files': stats['total_files'],
+            'customer_post_counts': stats['customer_post_counts'],
+            'monthly_data': stats['monthly_data']
+        })
+    response.set_etag(etag)
+    # 브라우저가 매번 ETag로 재검증하도록 함
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# 통합 검색용 스레드 풀 (요청 수와 관계없이 동시에 실행되는 게시판 검색 수를 제한)
+global_search_executor = ThreadPoolExecutor(max_workers=max(GLOBAL_SEARCH_WORKERS, 1), thread_name_prefix='global-search')
+
+def encode_search_cursor(row):
+    """통합 검색 다음 페이지 커서 (마지막 결과의 created_at, 게시판, id)"""
+    payload = {'c': row['created_at'].isoformat(), 'b': row['board'], 'i': row['id']}
+    raw = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_search_cursor(token):
+    """통합 검색 커서 해석 (잘못된 값이면 None)"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return datetime.fromisoformat(payload['c']), str(payload['b']), int(payload['i'])
+    except Exception:
+        return None
+
+def search_board(board_key, posts_table, scope, keyword, order, after, limit, use_replica):
+    """게시판 하나 검색 (global_search_executor 스레드에서 실행, 요청 컨텍스트 없음)
+
+    order='recent'면 (created_at DESC, 게시판, id DESC) 순서에서 after 다음 결과를 limit개,
+    order='relevance'면 관련도 순 상위 limit개를 반환한다.
+    """
+    with get_db_connection(read_only=use_replica) as db:
+        conditions, params, options = build_search_conditions(db, posts_table, keyword, board_key, scope)
+        conditions = scope[0] + conditions
+        params = list(scope[1]) + params
+        
+        cursor = db.cursor(dictionary=True)
+        matched_ids = options.get('matched_ids')
+        if matched_ids is not None:
+            # 오름차순 ID 배열(작성 순서와 같음) - after 다음의 상위 limit개 ID만 DB에서 읽음 (fetch_post_page와 동일)
+            if order == 'recent' and after:
+                created_at, after_board, after_id = after
+                if board_key == after_board:
+                    bound = after_id - 1
+                else:
+                    # 다른 게시판은 기준 시각 이전의 마지막 글 ID를 경계로 사용
+                    op = "<=" if board_key > after_board else "<"
+                    bound_conditions = scope[0] + [f"p.created_at {op} %s"]
+                    cursor.execute(f"""
+                        SELECT p.id FROM {posts_table} p WHERE {" AND ".join(bound_conditions)}
+                        ORDER BY p.created_at DESC, p.id DESC LIMIT 1
+                    """, tuple(scope[1]) + (created_at,))
+                    bound_row = cursor.fetchone()
+                    bound = bound_row['id'] if bound_row else 0
+                matched_ids = matched_ids[:bisect.bisect_right(matched_ids, bound)]
+            page_ids = list(matched_ids[-limit:])
+            if not page_ids:
+                cursor.close()
+                return []
+            conditions.append(f"p.id IN ({', '.join(['%s'] * len(page_ids))})")
+            params += page_ids
+        
+        rank = options.get('rank') if order == 'relevance' else None
+        if rank:
+            score_expr, score_params = rank
+        else:
+            score_expr, score_params = "0", []
+        
+        if order == 'recent' and after:
+            created_at, after_board, after_id = after
+            if board_key > after_board:
+                conditions.append("p.created_at <= %s")
+                params.append(created_at)
+            elif board_key == after_board:
+                conditions.append("(p.created_at < %s OR (p.created_at = %s AND p.id < %s))")
+                params += [created_at, created_at, after_id]
+            else:
+                conditions.append("p.created_at < %s")
+                params.append(created_at)
+        
+        order_clause = f"{score_expr} DESC, p.created_at DESC, p.id DESC" if rank else "p.created_at DESC, p.id DESC"
+        where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+        cursor.execute(f"""
+            SELECT p.id, p.title, p.summary, CASE WHEN p.summary IS NULL THEN p.content END as content,
+                   p.created_at, p.file_count, {score_expr} as score
+            FROM {posts_table} p{where_clause}
+            ORDER BY {order_clause}
+            LIMIT %s
+        """, tuple(score_params) + tuple(params) + tuple(score_params if rank else ()) + (limit,))
+        rows = cursor.fetchall()
+        cursor.close()
+    
+    for row in rows:
+        row['board'] = board_key
+        row['score'] = float(row['score'] or 0)
+    return rows
+
+def run_global_search(keyword, order='recent', page_cursor='', page=1, per_page=20):
+    """일반 게시판과 모든 고객사 게시판을 동시에 검색해 한 페이지로 합침
+
+    recent: 최신 글 순, 커서로 다음 페이지 이동 (게시판마다 per_page개만 읽음)
+    relevance: 관련도 순(FULLTEXT 검색일 때), 페이지 번호로 이동 (PAGINATION_MAX_OFFSET까지)
+    """
+    boards = [(GENERAL_BOARD, 'posts', ([], []), None)]
+    boards += [(board.table_name, board.posts_table, board.scope(), board.name) for board in customer_registry.all()]
+    names = {board_key: name for board_key, _, _, name in boards}
+    
+    after = decode_search_cursor(page_cursor) if order == 'recent' and page_cursor else None
+    if order == 'relevance':
+        page = min(max(page, 1), PAGINATION_MAX_OFFSET // per_page + 1)
+        limit = page * per_page
+    else:
+        limit = per_page
+    use_replica = should_use_replica()
+    
+    futures = {
+        board_key: global_search_executor.submit(search_board, board_key, posts_table, scope,
+                                                 keyword, order, after, limit, use_replica)
+        for board_key, posts_table, scope, _ in boards
+    }
+    
+    rows = []
+    failed = []
+    deadline = time.monotonic() + GLOBAL_SEARCH_TIMEOUT
+    for board_key, future in futures.items():
+        try:
+            rows += future.result(timeout=max(deadline - time.monotonic(), 0))
+        except Exception as e:
+            app.logger.warning(f"Global search failed on board {board_key}: {e}")
+            future.cancel()
+            failed.append(names[board_key] or '자료실')
+    
+    # 정렬 키가 같은 결과의 순서를 고정하기 위해 보조 키부터 차례로 정렬
+    rows.sort(key=lambda row: (row['board'], -row['id']))
+    rows.sort(key=lambda row: row['created_at'], reverse=True)
+    if order == 'relevance':
+        rows.sort(key=lambda row: row['score'], reverse=True)
+        results = rows[(page - 1) * per_page:page * per_page]
+        has_more = len(rows) > page * per_page
+        next_cursor = None
+    else:
+        results = rows[:per_page]
+        has_more = len(rows) > per_page
+        next_cursor = encode_search_cursor(results[-1]) if has_more else None
+    
+    for row in results:
+        row['customer_name'] = names[row['board']]
+    return {'results': results, 'next_cursor': next_cursor, 'has_more': has_more,
+            'page': page, 'failed_boards': failed}
+
+def format_search_result(row):
+    """통합 검색 결과 한 건을 화면/JSON용으로 변환"""
+    summary = row.get('summary')
+    if summary is None:
+        summary = make_summary(row.get('content'))
+    if row['customer_name']:
+        url = url_for('customer_post', customer_name=row['customer_name'], post_id=row['id'])
+    else:
+        url = url_for('post', post_id=row['id'])
+    return {
+        'board': row['customer_name'] or '자료실',
+        'customer_name': row['customer_name'],
+        'id': row['id'],
+        'title': row['title'],
+        'snippet': summary[:80] + ('...' if len(summary) > 80 else ''),
+        'file_count': row['file_count'],
+        'created_at': convert_to_kst(row['created_at']),
+        'url': url,
+    }
+
+@app.route('/search')
+@login_required
+@read_replica
+def global_search():
+    """통합 검색 페이지 (자료실 + 모든 고객사 게시판)"""
+    keyword = request.args.get('q', '', type=str).strip()
+    order = 'relevance' if request.args.get('order') == 'relevance' else 'recent'
+    page_cursor = request.args.get('cursor', '', type=str)
+    page = request.args.get('page', 1, type=int)
+    
+    result = None
+    if keyword:
+        try:
+            ensure_db_pool()
+            result = run_global_search(keyword, order, page_cursor, page)
+            result['results'] = [format_search_result(row) for row in result['results']]
+        except Exception as e:
+            app.logger.error(f"Error running global search '{keyword}': {e}")
+            flash("검색 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+    
+    return render_template('search.html', keyword=keyword, order=order, result=result)
+
+@app.route('/api/search')
+@login_required
+@read_replica
+def api_global_search():
+    """API: 통합 검색 (q, order=recent|relevance, cursor 또는 page)"""
+    keyword = request.args.get('q', '', type=str).strip()
+    if not keyword:
+        return jsonify({'success': False, 'message': '검색어를 입력하세요.'}), 400
+    order = 'relevance' if request.args.get('order') == 'relevance' else 'recent'
+    
+    try:
+        ensure_db_pool()
+        result = run_global_search(keyword, order,
+                                   request.args.get('cursor', '', type=str),
+                                   request.args.get('page', 1, type=int))
+    except Exception as e:
+        app.logger.error(f"Error running global search '{keyword}': {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    result['results'] = [format_search_result(row) for row in result['results']]
+    result['success'] = True
+    return jsonify(result)
 
 @app.route('/api/customers', methods=['POST'])
 @login_required
@@ -835,9 +3520,12 @@ def api_add_customer():
             
             # 테이블 생성
             table_name = create_customer_table(customer_name, db)
+            bump_customer_registry_version(cursor)
             db.commit()
             cursor.close()
         
+        customer_registry.invalidate()
+        
         app.logger.info(f"New customer added: {customer_name} (table: {table_name})")
         return jsonify({'success': True, 'message': '고객사가 성공적으로 추가되었습니다.'})
         
@@ -881,9 +3569,12 @@ def api_update_customer(customer_name):
             
             # 고객사 이름 변경
             cursor.execute("UPDATE customers SET name = %s WHERE name = %s", (new_name, customer_name))
+            bump_customer_registry_version(cursor)
             db.commit()
             cursor.close()
         
+        customer_registry.invalidate()
+        
         app.logger.info(f"Customer updated: {customer_name} -> {new_name}")
         return jsonify({'success': True, 'message': '고객사 이름이 수정되었습니다.'})
         
@@ -898,40 +3589,52 @@ def api_delete_customer(customer_name):
     try:
         ensure_db_pool()
         
-        table_name = get_customer_table_name(customer_name)
-        if not table_name:
+        board = get_customer_board(customer_name)
+        if not board:
             return jsonify({'success': False, 'message': '존재하지 않는 고객사입니다.'}), 404
+        table_name = board.table_name
         
         with get_db_connection() as db:
             cursor = db.cursor()
             
             # 1. 모든 게시글 ID를 조회하여 첨부 파일 먼저 삭제
-            cursor.execute(f"SELECT id FROM {table_name}")
+            scope_conditions, scope_params = board.scope()
+            where_clause = " WHERE " + " AND ".join(scope_conditions) if scope_conditions else ""
+            cursor.execute(f"SELECT p.id FROM {board.posts_table} p{where_clause}", scope_params)
             post_ids = [row[0] for row in cursor.fetchall()]
             
             app.logger.info(f"Deleting all files for {len(post_ids)} posts in customer {customer_name}...")
             
-            # DB 연결을 공유하지 않는 get_db_connection() 밖에서 delete_customer_files를 사용하거나,
-            # 현재 연결 내에서 처리합니다. (첨부 파일을 삭제하는 로직은 이미 delete_customer_files에 구현되어 있습니다.)
-            
-            # delete_customer_files는 내부적으로 자체 DB 연결을 사용하므로,
-            # 여기서는 DB 테이블을 삭제하기 전에 모든 게시글의 첨부 파일을 먼저 안전하게 삭제하도록 반복 호출합니다.
+            # delete_customer_files는 같은 트랜잭션에서 파일 레코드만 정리하고, 실제 파일은 commit 후 삭제합니다.
+            # DB 테이블을 삭제하기 전에 모든 게시글의 첨부 파일 레코드를 먼저 정리하도록 반복 호출합니다.
+            released = []
             for post_id in post_ids:
-                delete_customer_files(post_id, customer_name)
+                released += delete_customer_files(post_id, customer_name, db)
 
-            # 2. 파일 테이블 삭제
-            cursor.execute(f"DROP TABLE IF EXISTS {table_name}_files")
-            app.logger.info(f"Dropped table {table_name}_files")
-            
-            # 3. 게시글 테이블 삭제
-            cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-            app.logger.info(f"Dropped table {table_name}")
+            if board.shared:
+                # 2-3. 공용 테이블에서 해당 고객사 게시글 삭제 (파일 레코드는 delete_customer_files에서 삭제됨)
+                cursor.execute("DELETE FROM customer_posts WHERE customer_id = %s", (board.customer_id,))
+                app.logger.info(f"Deleted {cursor.rowcount} posts of {customer_name} from customer_posts")
+            else:
+                # 2. 파일 테이블 삭제
+                cursor.execute(f"DROP TABLE IF EXISTS {table_name}_files")
+                app.logger.info(f"Dropped table {table_name}_files")
+                
+                # 3. 게시글 테이블 삭제
+                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+                app.logger.info(f"Dropped table {table_name}")
             
-            # 4. 고객사 정보 삭제
+            # 4. 고객사 정보 및 집계 데이터 삭제
             cursor.execute("DELETE FROM customers WHERE name = %s", (customer_name,))
+            cursor.execute("DELETE FROM board_stats WHERE board = %s", (table_name,))
+            bump_customer_registry_version(cursor)
             
             db.commit()
             cursor.close()
+        remove_released_files(released)
+        
+        customer_registry.invalidate()
+        search_index.drop_board(table_name)
         
         app.logger.info(f"Customer deleted: {customer_name} (table: {table_name}) including all posts and files")
         return jsonify({'success': True, 'message': '고객사가 삭제되었습니다. 모든 게시글과 첨부 파일도 삭제되었습니다.'})
@@ -942,75 +3645,55 @@ def api_delete_customer(customer_name):
 
 @app.route('/customer/<customer_name>')
 @login_required
+@read_replica
 def customer_board(customer_name):
     """고객사 게시판 페이지"""
     try:
         ensure_db_pool()
         
         # 고객사 존재 확인
-        table_name = get_customer_table_name(customer_name)
-        if not table_name:
+        board = get_customer_board(customer_name)
+        if not board:
             flash("존재하지 않는 고객사입니다.")
             return redirect(url_for('dashboard'))
         
         page = request.args.get('page', 1, type=int)
+        page_cursor = request.args.get('cursor', '', type=str)
         search_keyword = request.args.get('search', '', type=str).strip()
         per_page = 10
-        offset = (page - 1) * per_page
         
         with get_db_connection() as db:
             cursor = db.cursor(dictionary=True)
             
+            conditions, condition_params = board.scope()
+            search_options = {}
             if search_keyword:
-                search_condition = f" WHERE p.title LIKE %s OR p.content LIKE %s"
-                search_params = (f'%{search_keyword}%', f'%{search_keyword}%')
-                count_params = search_params
-                list_params = search_params + (per_page, offset)
-            else:
-                search_condition = ""
-                search_params = ()
-                count_params = ()
-                list_params = (per_page, offset)
-            
-            # 총 게시글 수 조회
-            count_query = f"SELECT COUNT(*) as count FROM {table_name} p {search_condition}"
-            cursor.execute(count_query, count_params)
-            total_posts = cursor.fetchone()['count']
-            total_pages = (total_posts + per_page - 1) // per_page if total_posts > 0 else 1
+                search_conditions, search_params, search_options = build_search_conditions(
+                    db, board.posts_table, search_keyword, board.table_name, board.scope())
+                conditions += search_conditions
+                condition_params += search_params
             
             # 게시글 목록 조회
-            list_query = f"""
-                SELECT p.id, p.title, p.content, p.created_at,
-                       COUNT(pf.id) as file_count
-                FROM {table_name} p
-                LEFT JOIN {table_name}_files pf ON p.id = pf.post_id
-                {search_condition}
-                GROUP BY p.id, p.title, p.content, p.created_at
-                ORDER BY p.created_at DESC
-                LIMIT %s OFFSET %s
-            """
-            cursor.execute(list_query, list_params)
-            posts = cursor.fetchall()
+            posts, pagination = fetch_post_page(cursor, board.posts_table, conditions, condition_params,
+                                                page, page_cursor, per_page,
+                                                stats_board=None if search_keyword else board.table_name,
+                                                **search_options)
             cursor.close()
             
-            for i, post in enumerate(posts):
+            for post in posts:
                 post['created_at'] = convert_to_kst(post['created_at'])
-                post['seq'] = total_posts - (offset + i)
                 
                 title = post.get('title') or ''
                 post['short_title'] = title[:15] + ('...' if len(title) > 15 else '')
                 
-                content = post.get('content') or ''
-                # HTML 태그 제거하여 텍스트만 표시
-                clean_content = html.unescape(content)
-                clean_content = re.sub(r'<[^>]*>', '', clean_content)
-                post['short_content'] = clean_content[:25] + ('...' if len(clean_content) > 25 else '')
+                post['short_content'] = short_text(post)
         
         return render_template('customer_board.html',
                              customer_name=customer_name,
                              posts=posts,
-                             page=page,
-                             total_pages=total_pages,
+                             page=pagination['page'],
+                             total_pages=pagination['total_pages'],
+                             pagination=pagination,
                              search_keyword=search_keyword)
         
     except Exception as e:
@@ -1028,8 +3711,8 @@ def new_customer_post(customer_name):
         files = request.files.getlist('files[]')
         
         # 고객사 존재 확인
-        table_name = get_customer_table_name(customer_name)
-        if not table_name:
+        board = get_customer_board(customer_name)
+        if not board:
             flash("존재하지 않는 고객사입니다.")
             return redirect(url_for('dashboard'))
         
@@ -1050,20 +3733,19 @@ def new_customer_post(customer_name):
                 cursor = db.cursor()
                 
                 # 게시글 저장
-                cursor.execute(f"""
-                    INSERT INTO {table_name} (title, content)
-                    VALUES (%s, %s)
-                """, (title, content))
-                
-                post_id = cursor.lastrowid
+                post_id = board.insert_post(cursor, title, content)
                 
                 # 파일 저장
                 if files and any(file.filename for file in files):
                     save_customer_files(post_id, customer_name, files, db)
                 
+                # 게시판 집계 행 잠금은 파일 저장이 끝난 뒤 commit 직전에 잡음
+                update_board_stats(cursor, board.table_name, 1)
                 db.commit()
                 cursor.close()
             
+            search_index.index_post(board.table_name, post_id, title, content)
+            
             flash("게시글이 등록되었습니다.")
             app.logger.info(f"New post created for customer {customer_name}")
             return redirect(url_for('customer_board', customer_name=customer_name))
@@ -1083,20 +3765,21 @@ def new_customer_post(customer_name):
 
 @app.route('/customer/<customer_name>/<int:post_id>')
 @login_required
+@read_replica
 def customer_post(customer_name, post_id):
     """고객사 게시글 상세보기"""
     try:
         ensure_db_pool()
         
         # 고객사 존재 확인
-        table_name = get_customer_table_name(customer_name)
-        if not table_name:
+        board = get_customer_board(customer_name)
+        if not board:
             flash("존재하지 않는 고객사입니다.")
             return redirect(url_for('dashboard'))
         
         with get_db_connection() as db:
             cursor = db.cursor(dictionary=True)
-            cursor.execute(f"SELECT * FROM {table_name} WHERE id=%s", (post_id,))
+            cursor.execute(*customer_post_query(board, post_id))
             post = cursor.fetchone()
             cursor.close()
             
@@ -1124,8 +3807,11 @@ def customer_post(customer_name, post_id):
 @app.route('/customer/<customer_name>/edit/<int:post_id>', methods=['GET', 'POST'])
 @login_required
 def edit_customer_post(customer_name, post_id):
-    table_name = get_customer_table_name(customer_name)
     ensure_db_pool()
+    board = get_customer_board(customer_name)
+    if not board:
+        flash("존재하지 않는 고객사입니다.")
+        return redirect(url_for('dashboard'))
     
     # 1. POST: 데이터 업데이트 로직
     if request.method == 'POST':
@@ -1139,18 +3825,26 @@ def edit_customer_post(customer_name, post_id):
             with get_db_connection() as db:
                 cursor = db.cursor(dictionary=True)
                 
+                # 이 고객사의 게시글인지 확인 (공유 테이블에서는 다른 고객사 글의 파일을 건드리지 않도록)
+                # 수정 전 내용은 색인 갱신에도 사용
+                cursor.execute(*customer_post_query(board, post_id))
+                old_post = cursor.fetchone()
+                if not old_post:
+                    app.logger.warning(f"Customer post {post_id} not found for {customer_name} on edit")
+                    return "Post not found", 404
+                
                 # [수정] 기존 파일 목록 가져오기
                 existing_files = get_customer_files(post_id, customer_name)
                 
                 # 체크박스에 선택되지 않은(유지하지 않을) 파일들을 찾아 삭제합니다.
+                released = []
                 for f_info in existing_files:
                     if str(f_info['id']) not in keep_files:
-                        # 실제 NAS 파일 삭제
-                        f_path = os.path.join(app.config['UPLOAD_FOLDER'], f_info['file_name'])
-                        if os.path.exists(f_path):
-                            os.remove(f_path)
+                        # blob 참조 해제 (마지막 참조였던 NAS 파일은 commit 후 삭제)
+                        released += release_blobs(db, [f_info])
                         # DB 레코드 삭제
-                        cursor.execute(f"DELETE FROM {table_name}_files WHERE id = %s", (f_info['id'],))
+                        cursor.execute(f"DELETE FROM {board.files_table} WHERE id = %s", (f_info['id'],))
+                        adjust_file_count(cursor, board.posts_table, post_id, -cursor.rowcount)
 
                 # 새 파일 저장
                 new_files = [f for f in files if f and f.filename and f.filename.strip()]
@@ -1158,8 +3852,14 @@ def edit_customer_post(customer_name, post_id):
                     save_customer_files(post_id, customer_name, new_files, db)
 
                 # 게시글 정보 업데이트
-                cursor.execute(f"UPDATE {table_name} SET title=%s, content=%s WHERE id=%s", (title, content, post_id))
+                scope_conditions, scope_params = board.scope('p')
+                where_clause = " AND ".join(["p.id = %s"] + scope_conditions)
+                cursor.execute(f"UPDATE {board.posts_table} p SET p.title=%s, p.content=%s, p.summary=%s WHERE {where_clause}",
+                               (title, content, make_summary(content), post_id, *scope_params))
                 db.commit()
+            remove_released_files(released)
+            
+            search_index.update_post(board.table_name, post_id, old_post['title'], old_post['content'], title, content)
             
             flash("게시글이 수정되었습니다.")
             return redirect(url_for('customer_post', customer_name=customer_name, post_id=post_id, search=search_keyword))
@@ -1172,7 +3872,7 @@ def edit_customer_post(customer_name, post_id):
     try:
         with get_db_connection() as db:
             cursor = db.cursor(dictionary=True)
-            cursor.execute(f"SELECT * FROM {table_name} WHERE id = %s", (post_id,))
+            cursor.execute(*customer_post_query(board, post_id))
             post = cursor.fetchone()
             
         if not post:
@@ -1200,15 +3900,15 @@ def delete_customer_post(customer_name, post_id):
     try:
         ensure_db_pool()
         
-        table_name = get_customer_table_name(customer_name)
-        if not table_name:
+        board = get_customer_board(customer_name)
+        if not board:
             flash("존재하지 않는 고객사입니다.")
             return redirect(url_for('dashboard'))
         
         # 게시글 존재 확인
         with get_db_connection() as db:
             cursor = db.cursor(dictionary=True)
-            cursor.execute(f"SELECT * FROM {table_name} WHERE id=%s", (post_id,))
+            cursor.execute(*customer_post_query(board, post_id))
             post = cursor.fetchone()
             cursor.close()
             
@@ -1219,17 +3919,19 @@ def delete_customer_post(customer_name, post_id):
             
             app.logger.info(f"Found customer post {post_id} for deletion: {post['title']}")
         
-        # 파일 삭제
-        delete_customer_files(post_id, customer_name)
-        
-        # 게시글 삭제
+        # 파일 레코드와 게시글을 한 트랜잭션에서 삭제
         with get_db_connection() as db:
+            released = delete_customer_files(post_id, customer_name, db)
+            
             cursor = db.cursor()
-            cursor.execute(f"DELETE FROM {table_name} WHERE id=%s", (post_id,))
+            cursor.execute(f"DELETE FROM {board.posts_table} WHERE id=%s", (post_id,))
             deleted_rows = cursor.rowcount
             
             if deleted_rows > 0:
+                update_board_stats(cursor, board.table_name, -1, post['created_at'].strftime('%Y-%m'))
                 db.commit()
+                remove_released_files(released)
+                search_index.remove_post(board.table_name, post_id, post['title'], post['content'])
                 app.logger.info(f"Customer post {post_id} deleted successfully")
                 flash("게시글이 성공적으로 삭제되었습니다.")
             else:
@@ -1253,26 +3955,29 @@ def download_customer_file(customer_name, file_id):
     try:
         ensure_db_pool()
         
-        table_name = get_customer_table_name(customer_name)
-        if not table_name:
+        board = get_customer_board(customer_name)
+        if not board:
             flash("존재하지 않는 고객사입니다.")
             return redirect(url_for('dashboard'))
         
         with get_db_connection() as db:
             cursor = db.cursor(dictionary=True)
-            cursor.execute(f"SELECT file_name, original_file_name FROM {table_name}_files WHERE id=%s", (file_id,))
+            # 공용 테이블에서는 다른 고객사의 파일을 받을 수 없도록 게시글의 고객사 확인
+            scope_conditions, scope_params = board.scope('p')
+            where_clause = " AND ".join(["pf.id = %s"] + scope_conditions)
+            cursor.execute(f"""
+                SELECT pf.file_name, pf.original_file_name
+                FROM {board.files_table} pf
+                JOIN {board.posts_table} p ON p.id = pf.post_id
+                WHERE {where_clause}
+            """, (file_id, *scope_params))
             file_info = cursor.fetchone()
             cursor.close()
             
             if file_info and file_info['file_name']:
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], file_info['file_name'])
-                if os.path.exists(file_path):
-                    return send_from_directory(
-                        app.config['UPLOAD_FOLDER'],
-                        file_info['file_name'],
-                        as_attachment=True,
-                        download_name=file_info['original_file_name']
-                    )
+                file_relpath = find_upload(file_info['file_name'])
+                if file_relpath:
+                    return send_upload(file_relpath, download_name=file_info['original_file_name'])
                 else:
                     flash("파일이 존재하지 않습니다.")
                     return redirect(url_for('customer_board', customer_name=customer_name))
@@ -1285,21 +3990,26 @@ def download_customer_file(customer_name, file_id):
         flash("파일 다운로드 중 오류가 발생했습니다.")
         return redirect(url_for('customer_board', customer_name=customer_name))
           
+def check_upload_file(filename, file_size):
+    """업로드 가능 여부 확인 - 불가하면 사유 메시지, 가능하면 None 반환"""
+    lower_name = filename.lower()
+    has_extension = '.' in lower_name and lower_name.rindex('.') < len(lower_name) - 1
+    
+    if not has_extension:
+        return f"확장자가 없는 파일은 업로드할 수 없습니다: {filename}"
+    
+    # ZIP 파일 크기 체크
+    if lower_name.endswith('.zip') and file_size > MAX_ZIP_SIZE:
+        return f"ZIP 파일 크기가 {format_file_size(MAX_ZIP_SIZE)}를 초과합니다: {filename} (현재 크기: {format_file_size(file_size)})"
+    return None
+
 def validate_customer_files(files):
     """고객사 게시글 파일 유효성 검사"""
     for file in files:
         if file and file.filename:
-            filename = file.filename.lower()
-            has_extension = '.' in filename and filename.rindex('.') < len(filename) - 1
-            
-            if not has_extension:
-                return False, f"확장자가 없는 파일은 업로드할 수 없습니다: {file.filename}"
-            
-            # ZIP 파일 크기 체크
-            if filename.endswith('.zip'):
-                file_size = get_file_size(file)
-                if file_size > MAX_ZIP_SIZE:
-                    return False, f"ZIP 파일 크기가 100MB를 초과합니다: {file.filename} (현재 크기: {format_file_size(file_size)})"
+            error = check_upload_file(file.filename, get_file_size(file))
+            if error:
+                return False, error
     
     return True, "파일 검증 완료"
 
@@ -1307,7 +4017,57 @@ def validate_customer_files(files):
 @app.route('/check_file_size', methods=['POST'])
 @login_required
 def check_file_size():
-    """파일 크기 확인 API"""
+    """업로드 사전 확인 API - 파일 본문 없이 이름/크기/형식만 JSON으로 받아 파일별 허용 여부 반환
+
+    요청: {"files": [{"name": "a.zip", "size": 1234, "type": "application/zip"}, ...], "selected_size": 이미 선택한 파일 크기 합계}
+    이전 클라이언트의 multipart 요청(files[]에 파일 본문)은 기존 형식으로 응답한다.
+    """
+    if request.mimetype == 'multipart/form-data':
+        return check_uploaded_file_size()
+    
+    data = request.get_json(silent=True) or {}
+    files = data.get('files')
+    
+    if not isinstance(files, list) or not files:
+        return jsonify({'error': 'No files selected'}), 400
+    try:
+        total_size = int(data.get('selected_size') or 0)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid selected size'}), 400
+
+    results = []
+    for file_info in files:
+        if not isinstance(file_info, dict):
+            return jsonify({'error': 'Invalid file entry'}), 400
+        name = str(file_info.get('name') or '')
+        try:
+            size = int(file_info.get('size') or 0)
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Invalid file size: {name}'}), 400
+        
+        error = check_upload_file(name, size)
+        # 게시글 하나의 첨부 파일 합계 제한 (reject_oversized_upload와 같은 기준)
+        if error is None and MAX_UPLOAD_REQUEST_SIZE and total_size + size > MAX_UPLOAD_REQUEST_SIZE:
+            error = (f"첨부 파일 전체 크기가 {format_file_size(MAX_UPLOAD_REQUEST_SIZE)}를 초과합니다: {name} "
+                     f"(현재 크기: {format_file_size(total_size + size)})")
+        if error is None:
+            total_size += size
+        results.append({
+            'name': name,
+            'size': size,
+            'accepted': error is None,
+            'message': error,
+        })
+
+    return jsonify({
+        'success': all(result['accepted'] for result in results),
+        'files': results,
+        'max_zip_size': MAX_ZIP_SIZE,
+        'max_request_size': MAX_UPLOAD_REQUEST_SIZE,
+    }), 200
+
+def check_uploaded_file_size():
+    """파일 크기 확인 (이전 multipart 방식) - 첫 번째로 거부된 파일만 오류로 반환"""
     files = request.files.getlist('files[]')
     
     if not files or all(file.filename == '' for file in files):
@@ -1326,20 +4086,180 @@ def check_file_size():
             if file_size > MAX_ZIP_SIZE:
                 return jsonify({
                     'error': 'File too large',
-                    'message': f'ZIP 파일 크기가 100MB를 초과합니다: {file.filename} (현재 크기: {format_file_size(file_size)})',
+                    'message': check_upload_file(file.filename, file_size),
                     'max_size': format_file_size(MAX_ZIP_SIZE),
                     'current_size': format_file_size(file_size)
                 }), 413
 
     return jsonify({'success': True}), 200
 
+@app.context_processor
+def upload_limits():
+    """업로드 화면의 브라우저 확인(사전 확인 API를 쓸 수 없을 때)에 서버와 같은 제한 사용"""
+    return {'upload_limits': {
+        'max_zip_size': MAX_ZIP_SIZE,
+        'max_zip_size_label': format_file_size(MAX_ZIP_SIZE),
+        'max_request_size': MAX_UPLOAD_REQUEST_SIZE,
+    }}
+
+@app.route('/api/uploads', methods=['POST'])
+@login_required
+def api_create_upload():
+    """API: 이어받기 업로드 세션 생성 - {"name": ..., "size": ...}"""
+    data = request.get_json(silent=True) or {}
+    name = str(data.get('name') or '').strip()
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': '파일 크기가 올바르지 않습니다.'}), 400
+    
+    if not name or size < 0:
+        return jsonify({'success': False, 'message': '파일 이름과 크기를 입력하세요.'}), 400
+    error = check_upload_file(name, size)
+    if error:
+        return jsonify({'success': False, 'message': error}), 413 if name.lower().endswith('.zip') else 400
+    
+    try:
+        upload_id = resumable_uploads.create(os.path.basename(name), size, session.get('username'))
+    except OSError as e:
+        app.logger.error(f"Error creating upload session: {e}")
+        return jsonify({'success': False, 'message': '업로드를 시작할 수 없습니다.'}), 500
+    
+    app.logger.info(f"Upload session created: {upload_id} ({name}, {size} bytes)")
+    return jsonify({'success': True, 'upload_id': upload_id, 'offset': 0, 'chunk_size': UPLOAD_CHUNK_SIZE}), 201
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+@login_required
+def api_upload_status(upload_id):
+    """API: 업로드 진행 상황 (받은 바이트 수 offset부터 이어서 보내면 됨)"""
+    meta = resumable_uploads.get(upload_id, session.get('username'))
+    if meta is None:
+        return jsonify({'success': False, 'message': '업로드 세션을 찾을 수 없습니다.'}), 404
+    return jsonify({
+        'success': True,
+        'upload_id': upload_id,
+        'name': meta['name'],
+        'size': meta['size'],
+        'offset': meta['offset'],
+        'complete': meta['offset'] == meta['size'],
+        'expires_at': convert_to_kst(datetime.fromtimestamp(meta['expires_at'], pytz.utc).replace(tzinfo=None)),
+    })
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+@login_required
+def api_upload_chunk(upload_id):
+    """API: 조각 업로드 - ?offset=<받은 바이트 수>, 본문은 조각 데이터 그대로"""
+    meta = resumable_uploads.get(upload_id, session.get('username'))
+    if meta is None:
+        return jsonify({'success': False, 'message': '업로드 세션을 찾을 수 없습니다.'}), 404
+    
+    offset = request.args.get('offset', type=int)
+    length = request.content_length
+    if offset is None or length is None:
+        return jsonify({'success': False, 'message': 'offset과 Content-Length가 필요합니다.'}), 400
+    if length > UPLOAD_CHUNK_SIZE:
+        return jsonify({'success': False, 'message': f'조각 크기는 {format_file_size(UPLOAD_CHUNK_SIZE)} 이하여야 합니다.'}), 413
+    if offset + length > meta['size']:
+        return jsonify({'success': False, 'message': '파일 크기를 초과하는 조각입니다.'}), 400
+    
+    try:
+        current, written = resumable_uploads.write_chunk(upload_id, offset, request.stream, length)
+    except OSError as e:
+        app.logger.error(f"Error writing upload chunk {upload_id}@{offset}: {e}")
+        return jsonify({'success': False, 'message': '조각을 저장하지 못했습니다.'}), 500
+    
+    if not written:
+        return jsonify({'success': False, 'message': 'offset이 일치하지 않습니다.', 'offset': current}), 409
+    return jsonify({'success': True, 'offset': current, 'complete': current == meta['size']})
+
+@app.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+@login_required
+def api_finalize_upload(upload_id):
+    """API: 다 받은 파일을 게시글에 첨부 - {"post_id": ..., "customer_name": 고객사 게시글이면 지정}"""
+    meta = resumable_uploads.get(upload_id, session.get('username'))
+    if meta is None:
+        return jsonify({'success': False, 'message': '업로드 세션을 찾을 수 없습니다.'}), 404
+    if meta['offset'] != meta['size']:
+        return jsonify({'success': False, 'message': '아직 업로드가 끝나지 않았습니다.', 'offset': meta['offset']}), 409
+    
+    data = request.get_json(silent=True) or {}
+    post_id = data.get('post_id')
+    customer_name = data.get('customer_name')
+    
+    if customer_name:
+        board = get_customer_board(customer_name)
+        if not board:
+            return jsonify({'success': False, 'message': '존재하지 않는 고객사입니다.'}), 404
+        posts_table, files_table = board.posts_table, board.files_table
+        scope_conditions, scope_params = board.scope('p')
+    else:
+        posts_table, files_table = 'posts', 'post_files'
+        scope_conditions, scope_params = [], []
+    
+    try:
+        with open(resumable_uploads.part_path(upload_id), 'rb') as f:
+            sha256 = file_sha256(f)
+        
+        with get_db_connection() as db:
+            cursor = db.cursor()
+            where_clause = " AND ".join(["p.id = %s"] + scope_conditions)
+            cursor.execute(f"SELECT p.id FROM {posts_table} p WHERE {where_clause}", (post_id, *scope_params))
+            if cursor.fetchone() is None:
+                cursor.close()
+                return jsonify({'success': False, 'message': '게시글을 찾을 수 없습니다.'}), 404
+            
+            file_name, is_new = acquire_blob(db, sha256, meta['size'])
+            cursor.execute(f"""
+                INSERT INTO {files_table} (post_id, file_name, original_file_name, file_size, blob_sha256)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (post_id, file_name, meta['name'], meta['size'], sha256))
+            adjust_file_count(cursor, posts_table, post_id, 1)
+            
+            if is_new:
+                file_path = upload_path(file_name)
+                resumable_uploads.take(upload_id, file_path)
+                try:
+                    db.commit()
+                except Exception:
+                    # 유일한 사본이므로 지우지 않고 세션으로 되돌림
+                    resumable_uploads.restore(upload_id, file_path)
+                    raise
+            else:
+                db.commit()
+            resumable_uploads.discard(upload_id)
+            cursor.close()
+    except Exception as e:
+        app.logger.error(f"Error finalizing upload {upload_id}: {e}")
+        return jsonify({'success': False, 'message': '파일을 첨부하지 못했습니다.'}), 500
+    
+    app.logger.info(f"Upload {upload_id} attached to {posts_table} post {post_id}: {file_name} "
+                    f"(original: {meta['name']}, {'new' if is_new else 'deduplicated'})")
+    return jsonify({
+        'success': True,
+        'file': {'file_name': file_name, 'original_file_name': meta['name'], 'file_size': meta['size']},
+    })
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def api_cancel_upload(upload_id):
+    """API: 업로드 취소"""
+    if resumable_uploads.get(upload_id, session.get('username')) is None:
+        return jsonify({'success': False, 'message': '업로드 세션을 찾을 수 없습니다.'}), 404
+    resumable_uploads.discard(upload_id)
+    return jsonify({'success': True})
+
+@app.cli.command('cleanup-uploads')
+def cleanup_uploads_command():
+    """만료된 이어받기 업로드 세션 삭제 (flask --app app cleanup-uploads)"""
+    resumable_uploads.cleanup()
+
 def get_post_files(post_id):
     """게시글의 첨부 파일 목록을 가져옴"""
     try:
         with get_db_connection() as db:
             cursor = db.cursor(dictionary=True)
             cursor.execute("""
-                SELECT id, file_name, original_file_name, file_size 
+                SELECT id, file_name, original_file_name, file_size, blob_sha256
                 FROM post_files 
                 WHERE post_id = %s 
                 ORDER BY id
@@ -1368,62 +4288,56 @@ def save_post_files(post_id, files, db):
             else:
                 file_size = get_file_size(file)
 
-            # 고유한 파일명 생성
-            unique_filename = str(uuid.uuid4()) + os.path.splitext(file.filename)[1]
-
             try:
-                # 파일 저장
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                file.save(file_path)
+                # 같은 내용의 파일이 이미 저장되어 있으면 참조 수만 늘리고 다시 쓰지 않음
+                sha256 = upload_sha256(file)
+                file_name, is_new = acquire_blob(db, sha256, file_size)
+                if is_new:
+                    store_upload(file, upload_path(file_name))
 
                 # 데이터베이스에 파일 정보 저장 (commit은 하지 않음)
                 cursor.execute("""
-                    INSERT INTO post_files (post_id, file_name, original_file_name, file_size)
-                    VALUES (%s, %s, %s, %s)
-                """, (post_id, unique_filename, original_filename, file_size))
+                    INSERT INTO post_files (post_id, file_name, original_file_name, file_size, blob_sha256)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (post_id, file_name, original_filename, file_size, sha256))
 
                 saved_files.append({
-                    'file_name': unique_filename,
+                    'file_name': file_name,
                     'original_file_name': original_filename,
-                    'file_size': file_size
+                    'file_size': file_size,
+                    'is_new': is_new
                 })
 
-                app.logger.info(f"File saved: {unique_filename} (original: {original_filename})")
+                app.logger.info(f"File saved: {file_name} (original: {original_filename}, "
+                                f"{'new' if is_new else 'deduplicated'})")
 
             except Exception as file_error:
                 app.logger.error(f"Failed to save file {original_filename}: {file_error}")
                 for saved_file in saved_files:
+                    if not saved_file['is_new']:
+                        continue
                     try:
-                        os.remove(os.path.join(app.config['UPLOAD_FOLDER'], saved_file['file_name']))
+                        remove_upload(saved_file['file_name'])
                     except:
                         pass
                 raise file_error
 
+    adjust_file_count(cursor, 'posts', post_id, len(saved_files))
     cursor.close()
     return saved_files
 
-def delete_post_files(post_id):
-    """게시글의 모든 첨부 파일을 삭제"""
-    try:
-        files = get_post_files(post_id)
-        
-        for file_info in files:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], file_info['file_name'])
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    app.logger.info(f"File deleted: {file_path}")
-                except Exception as file_error:
-                    app.logger.warning(f"Failed to delete file {file_path}: {file_error}")
-        
-        with get_db_connection() as db:
-            cursor = db.cursor()
-            cursor.execute("DELETE FROM post_files WHERE post_id = %s", (post_id,))
-            db.commit()
-            cursor.close()
-                
-    except Exception as e:
-        app.logger.error(f"Error deleting files for post {post_id}: {e}")
+def delete_post_files(post_id, db):
+    """게시글의 모든 첨부 파일 레코드 삭제 (호출한 쪽의 트랜잭션 안에서 실행, commit하지 않음)
+
+    더 이상 참조되지 않는 저장 파일명 목록을 반환하며, 호출한 쪽이 commit 후 remove_released_files로 지운다.
+    """
+    files = get_post_files(post_id)
+    released = release_blobs(db, files)
+    cursor = db.cursor()
+    cursor.execute("DELETE FROM post_files WHERE post_id = %s", (post_id,))
+    cursor.execute("UPDATE posts SET file_count = 0 WHERE id = %s", (post_id,))
+    cursor.close()
+    return released
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -1544,72 +4458,48 @@ def logout():
 
 @app.route('/')
 @login_required
+@read_replica
 def index():
     try:
         ensure_db_pool()
 
         page = request.args.get('page', 1, type=int)
+        page_cursor = request.args.get('cursor', '', type=str)
         search_keyword = request.args.get('search', '', type=str).strip()
         per_page = 10
-        offset = (page - 1) * per_page
 
         with get_db_connection() as db:
             cursor = db.cursor(dictionary=True)
             
             if search_keyword:
-                search_condition = """
-                    WHERE p.title LIKE %s OR p.content LIKE %s
-                """
-                search_params = (f'%{search_keyword}%', f'%{search_keyword}%')
-                count_params = search_params
-                list_params = search_params + (per_page, offset)
+                conditions, search_params, search_options = build_search_conditions(db, 'posts', search_keyword, GENERAL_BOARD)
             else:
-                search_condition = ""
-                search_params = ()
-                count_params = ()
-                list_params = (per_page, offset)
-            
-            count_query = f"SELECT COUNT(*) as count FROM posts p {search_condition}"
-            cursor.execute(count_query, count_params)
-            total_posts = cursor.fetchone()['count']
-            total_pages = (total_posts + per_page - 1) // per_page if total_posts > 0 else 1
-
-            list_query = f"""
-                SELECT p.id, p.title, p.content, p.created_at,
-                       COUNT(pf.id) as file_count
-                FROM posts p
-                LEFT JOIN post_files pf ON p.id = pf.post_id
-                {search_condition}
-                GROUP BY p.id, p.title, p.content, p.created_at
-                ORDER BY p.created_at DESC
-                LIMIT %s OFFSET %s
-            """
-            cursor.execute(list_query, list_params)
-            posts = cursor.fetchall()
+                conditions, search_params, search_options = [], [], {}
+            
+            posts, pagination = fetch_post_page(cursor, 'posts', conditions, search_params,
+                                                page, page_cursor, per_page,
+                                                stats_board=None if search_keyword else GENERAL_BOARD,
+                                                **search_options)
             cursor.close()
+            page = pagination['page']
 
-            for i, post in enumerate(posts):
+            for post in posts:
                 post['created_at'] = convert_to_kst(post['created_at'])
-                post['seq'] = total_posts - (offset + i)
 
                 title = post.get('title') or ''
                 post['short_title'] = title[:15] + ('...' if len(title) > 15 else '')
 
-                content = post.get('content') or ''
-                # HTML 태그 제거하여 텍스트만 표시
-                clean_content = html.unescape(content)
-                clean_content = re.sub(r'<[^>]*>', '', clean_content)
-                post['short_content'] = clean_content[:25] + ('...' if len(clean_content) > 25 else '')
+                post['short_content'] = short_text(post)
 
         app.logger.info(f"Successfully loaded {len(posts)} posts for page {page}" + 
                        (f" with search keyword '{search_keyword}'" if search_keyword else ""))
-        return render_template('index.html', posts=posts, page=page, total_pages=total_pages, 
-                             search_keyword=search_keyword)
+        return render_template('index.html', posts=posts, page=page, total_pages=pagination['total_pages'], 
+                             pagination=pagination, search_keyword=search_keyword)
 
     except Exception as e:
         app.logger.error(f"Error fetching posts: {e}")
         flash("게시글을 가져오는 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
-        return render_template('index.html', posts=[], page=1, total_pages=1, search_keyword='')
+        return render_template('index.html', posts=[], page=1, total_pages=1, pagination=None, search_keyword='')
 
 @app.route('/delete/<int:post_id>', methods=['POST'])
 @login_required
@@ -1631,9 +4521,10 @@ def delete_post(post_id):
                 
             app.logger.info(f"Found post {post_id} for deletion: {post['title']}")
         
-        delete_post_files(post_id)
-        
         with get_db_connection() as db:
+            # 파일 레코드도 게시글과 같은 트랜잭션에서 삭제
+            released = delete_post_files(post_id, db)
+            
             cursor = db.cursor()
             
             cursor.execute("SELECT COUNT(*) as count FROM posts WHERE id=%s", (post_id,))
@@ -1645,7 +4536,10 @@ def delete_post(post_id):
             app.logger.info(f"DELETE query executed, affected rows: {deleted_rows}")
             
             if deleted_rows > 0:
+                update_board_stats(cursor, GENERAL_BOARD, -1, post['created_at'].strftime('%Y-%m'))
                 db.commit()
+                remove_released_files(released)
+                search_index.remove_post(GENERAL_BOARD, post_id, post['title'], post['content'])
                 app.logger.info(f"Transaction committed for post {post_id}")
                 flash("게시글이 성공적으로 삭제되었습니다.")
             else:
@@ -1663,6 +4557,7 @@ def delete_post(post_id):
 
 @app.route('/post/<int:post_id>')
 @login_required
+@read_replica
 def post(post_id):
     try:
         ensure_db_pool()
@@ -1768,16 +4663,12 @@ def edit_post(post_id):
                         if str(file_info['id']) not in keep_files:
                             files_to_delete.append(file_info)
                     
+                    # 마지막 참조였던 NAS 파일은 commit 후 삭제 (롤백되면 그대로 둠)
+                    released = []
                     for file_info in files_to_delete:
-                        file_path = os.path.join(app.config['UPLOAD_FOLDER'], file_info['file_name'])
-                        if os.path.exists(file_path):
-                            try:
-                                os.remove(file_path)
-                                app.logger.info(f"Old file deleted: {file_path}")
-                            except Exception as file_error:
-                                app.logger.warning(f"Failed to delete old file {file_path}: {file_error}")
-                        
+                        released += release_blobs(db, [file_info])
                         cursor.execute("DELETE FROM post_files WHERE id = %s", (file_info['id'],))
+                        adjust_file_count(cursor, 'posts', post_id, -cursor.rowcount)
 
                     new_files = [f for f in files if f and f.filename and f.filename.strip()]
                     if new_files:
@@ -1796,14 +4687,17 @@ def edit_post(post_id):
 
                     cursor.execute("""
                         UPDATE posts 
-                        SET title=%s, content=%s
+                        SET title=%s, content=%s, summary=%s
                         WHERE id=%s
-                    """, (title, content, post_id))
+                    """, (title, content, make_summary(content), post_id))
                     
                     affected_rows = cursor.rowcount
                     
                     if affected_rows >= 0:
                         db.commit()
+                        remove_released_files(released)
+                        search_index.update_post(GENERAL_BOARD, post_id, existing_post['title'], existing_post['content'],
+                                                 title, content)
                         flash("게시글이 성공적으로 수정되었습니다.")
                         cursor.close()
                         
@@ -1868,17 +4762,21 @@ def new_post():
                 cursor = db.cursor()
                 
                 cursor.execute("""
-                    INSERT INTO posts (title, content)
-                    VALUES (%s, %s)
-                """, (title, content))
+                    INSERT INTO posts (title, content, summary)
+                    VALUES (%s, %s, %s)
+                """, (title, content, make_summary(content)))
                 
                 post_id = cursor.lastrowid
                 
                 if files and any(file.filename for file in files):
                     save_post_files(post_id, files, db)
                 
+                # 게시판 집계 행 잠금은 파일 저장이 끝난 뒤 commit 직전에 잡음
+                update_board_stats(cursor, GENERAL_BOARD, 1)
                 db.commit()
                 cursor.close()
+            
+            search_index.index_post(GENERAL_BOARD, post_id, title, content)
                 
             flash("게시글이 등록되었습니다.")
             app.logger.info("New post created successfully")
@@ -1895,7 +4793,7 @@ def new_post():
 @app.route('/uploads/<filename>')
 @login_required
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return send_upload(find_upload(filename) or filename, immutable=True)
 
 @app.route('/download/<int:file_id>')
 @login_required
@@ -1910,14 +4808,9 @@ def download_file(file_id):
             cursor.close()
 
             if file_info and file_info['file_name']:
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], file_info['file_name'])
-                if os.path.exists(file_path):
-                    return send_from_directory(
-                        app.config['UPLOAD_FOLDER'],
-                        file_info['file_name'],
-                        as_attachment=True,
-                        download_name=file_info['original_file_name']
-                    )
+                file_relpath = find_upload(file_info['file_name'])
+                if file_relpath:
+                    return send_upload(file_relpath, download_name=file_info['original_file_name'])
                 else:
                     flash("파일이 존재하지 않습니다.")
                     return redirect(url_for('index'))
@@ -1930,6 +4823,124 @@ def download_file(file_id):
         flash("파일 다운로드 중 오류가 발생했습니다.")
         return redirect(url_for('index'))
 
+image_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-derivative')
+
+def derivative_width(width):
+    """요청 너비를 허용된 축소본 너비로 맞춤 (요청 이상인 것 중 가장 작은 값)"""
+    return next((w for w in IMAGE_DERIVATIVE_WIDTHS if w >= width), IMAGE_DERIVATIVE_WIDTHS[-1])
+
+def is_image_upload(file_name):
+    """에디터 이미지 확장자의 저장 파일인지 확인 (확장자 없는 blob 첨부 파일 등은 제외)"""
+    return os.path.splitext(file_name.lower())[1] in IMAGE_EXTENSIONS
+
+def remove_image_derivatives(file_name):
+    """원본 옆에 만든 축소본(<이름>.w<너비>.<형식>, IMAGE_DERIVATIVE_WIDTHS 너비) 삭제"""
+    if not is_image_upload(file_name):
+        return
+    stem = os.path.splitext(file_name)[0]
+    for directory in {os.path.dirname(upload_relpath(file_name)), ''}:
+        for width in IMAGE_DERIVATIVE_WIDTHS:
+            for extension in ('webp', 'jpg'):
+                path = os.path.join(app.config['UPLOAD_FOLDER'], directory, f"{stem}.w{width}.{extension}")
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    app.logger.warning(f"Failed to delete image derivative {path}: {e}")
+
+def make_image_derivative(file_name, width):
+    """에디터 이미지의 축소본을 원본 옆에 만들고 UPLOAD_FOLDER 기준 상대 경로 반환 (이미 있으면 그대로)
+
+    EXIF 방향을 반영한 뒤 메타데이터 없이 다시 저장하며, 원본보다 크게 늘리지 않는다.
+    만들 수 없으면(Pillow 없음, 이미지가 아닌 파일, 움직이는 GIF, 손상된 파일) None.
+    """
+    if Image is None or not is_image_upload(file_name):
+        return None
+    original = find_upload(file_name)
+    if original is None:
+        return None
+    
+    extension = 'jpg' if IMAGE_DERIVATIVE_FORMAT == 'jpeg' else IMAGE_DERIVATIVE_FORMAT
+    derivative = os.path.join(os.path.dirname(original), f"{os.path.splitext(file_name)[0]}.w{width}.{extension}")
+    path = os.path.join(app.config['UPLOAD_FOLDER'], derivative)
+    if os.path.exists(path):
+        return derivative
+    
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with Image.open(os.path.join(app.config['UPLOAD_FOLDER'], original)) as source:
+            if getattr(source, 'is_animated', False):
+                return None
+            image = ImageOps.exif_transpose(source)
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            
+            has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+            if IMAGE_DERIVATIVE_FORMAT == 'jpeg' and has_alpha:
+                # JPEG은 투명도를 지원하지 않으므로 흰 배경에 합성
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, 'white')
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode not in ('RGB', 'RGBA') or IMAGE_DERIVATIVE_FORMAT == 'jpeg':
+                image = image.convert('RGBA' if has_alpha else 'RGB')
+            
+            # exif 인자를 넘기지 않으므로 촬영 위치 등 메타데이터는 저장되지 않음
+            image.save(temp_path, IMAGE_DERIVATIVE_FORMAT.upper(), quality=IMAGE_DERIVATIVE_QUALITY)
+        os.replace(temp_path, path)
+        return derivative
+    except Exception as e:
+        app.logger.warning(f"Failed to create image derivative {file_name} (w{width}): {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return None
+
+@app.route('/images/<filename>/<int:width>')
+@login_required
+def image_derivative(filename, width):
+    """에디터 이미지 축소본 (처음 요청 시 생성해 원본 옆에 저장, 만들 수 없으면 원본)"""
+    original = find_upload(filename) if is_image_upload(filename) else None
+    if original is None:
+        abort(404)
+    return send_upload(make_image_derivative(filename, derivative_width(width)) or original, immutable=True)
+
+def uploaded_image_pattern():
+    """이 앱의 /uploads/ 주소(상대 경로 또는 현재 호스트의 절대 주소)를 가리키는 에디터 이미지 태그 패턴
+
+    다른 사이트의 .../uploads/... 이미지는 건드리지 않는다.
+    """
+    prefix = url_for('uploaded_file', filename='x')[:-1]
+    host = request.host_url.rstrip('/')
+    extensions = '|'.join(re.escape(ext) for ext in IMAGE_EXTENSIONS)
+    return re.compile(
+        rf'<img\b[^>]*?\bsrc="(?:{re.escape(host)})?{re.escape(prefix)}([A-Za-z0-9_-][A-Za-z0-9._-]*(?:{extensions}))"[^>]*>',
+        re.IGNORECASE,
+    )
+
+@app.template_filter('responsive_images')
+def responsive_images(content):
+    """게시글 본문의 에디터 이미지를 축소본(src/srcset)으로 표시 (저장된 본문과 원본 파일은 그대로)"""
+    if Image is None or not content:
+        return content
+    
+    def replace(match):
+        tag = match.group(0)
+        if 'srcset=' in tag.lower():
+            return tag
+        filename = match.group(1)
+        display_url = url_for('image_derivative', filename=filename, width=derivative_width(IMAGE_DISPLAY_WIDTH))
+        srcset = ', '.join(f"{url_for('image_derivative', filename=filename, width=w)} {w}w" for w in IMAGE_DERIVATIVE_WIDTHS)
+        tag = re.sub(r'\bsrc="[^"]*"', lambda _: f'src="{display_url}"', tag, count=1)
+        extra = f' srcset="{srcset}" sizes="(max-width: {IMAGE_DISPLAY_WIDTH}px) 100vw, {IMAGE_DISPLAY_WIDTH}px"'
+        if 'loading=' not in tag.lower():
+            extra += ' loading="lazy"'
+        return re.sub(r'\s*/?>$', lambda end: extra + end.group(0), tag, count=1)
+    
+    return uploaded_image_pattern().sub(replace, content)
+
 @app.route('/upload_image', methods=['POST'])
 @login_required
 def upload_image():
@@ -1945,18 +4956,20 @@ def upload_image():
         
         if file and allowed_file(file.filename):
             # 이미지 파일인지 확인
-            allowed_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
             file_ext = os.path.splitext(file.filename.lower())[1]
             
-            if file_ext not in allowed_extensions:
+            if file_ext not in IMAGE_EXTENSIONS:
                 return jsonify({'error': {'message': 'Invalid image format'}}), 400
             
             # 고유한 파일명 생성
             unique_filename = str(uuid.uuid4()) + file_ext
             
             # 파일 저장
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            file.save(file_path)
+            store_upload(file, upload_path(unique_filename))
+            
+            # 본문 표시용 축소본은 응답을 기다리게 하지 않도록 백그라운드에서 미리 생성
+            if IMAGE_DERIVATIVE_ON_UPLOAD and Image is not None:
+                image_executor.submit(make_image_derivative, unique_filename, derivative_width(IMAGE_DISPLAY_WIDTH))
             
             # URL 생성
             image_url = url_for('uploaded_file', filename=unique_filename, _external=True)
@@ -1983,18 +4996,34 @@ def health_check():
             cursor.execute("SELECT 1")
             cursor.fetchone()
             cursor.close()
-        return {"status": "healthy", "database": "connected"}, 200
+        return {"status": "healthy", "database": "connected", "circuit_breaker": db_circuit_breaker.get_state()}, 200
     except Exception as e:
         app.logger.error(f"Health check failed: {e}")
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}, 500
 
+@app.route('/api/db_pool/stats')
+@login_required
+def db_pool_stats():
+    """연결 풀 계측 데이터 조회 API (DB_POOL_SIZE 산정용)"""
+    if db_pool is None:
+        return jsonify({'error': 'Connection pool is not initialized'}), 503
+    stats = db_pool.get_stats()
+    if replica_pool is not None:
+        stats['replica'] = replica_pool.get_stats()
+        stats['replica']['lag_healthy'] = replica_lag_state['healthy']
+    return jsonify(stats)
+
 def cleanup_db_pool():
     """애플리케이션 종료 시 데이터베이스 연결 풀 정리"""
-    global db_pool
+    global db_pool, replica_pool
     if db_pool:
         app.logger.info("Cleaning up database connection pool")
         db_pool.close_all()
         db_pool = None
+    if replica_pool:
+        app.logger.info("Cleaning up replica connection pool")
+        replica_pool.close_all()
+        replica_pool = None
 
 def signal_handler(signum, frame):
     """시그널 핸들러 - 우아한 종료"""
@@ -2006,6 +5035,7 @@ signal.signal(signal.SIGTERM, signal_handler)
 signal.signal(signal.SIGINT, signal_handler)
 
 atexit.register(cleanup_db_pool)
+atexit.register(search_index.flush)
 
 if __name__ == '__main__':
     try:
@@ -2016,6 +5046,7 @@ if __name__ == '__main__':
         app.logger.info(f"  Upload Folder: {app.config['UPLOAD_FOLDER']}")
         app.logger.info(f"  Max ZIP Size: {MAX_ZIP_SIZE} bytes")
         app.logger.info(f"  DB Pool Size: {DB_POOL_SIZE}")
+        app.logger.info(f"  DB Replica: {REPLICA_DB_CONFIG['host'] + ':' + str(REPLICA_DB_CONFIG['port']) if DB_REPLICA_HOST else 'Disabled'}")
         app.logger.info(f"  2FA Code Expiry: {TWO_FA_CODE_EXPIRY} seconds ({TWO_FA_CODE_EXPIRY // 60} minutes)")
         app.logger.info(f"  CKEditor: Enabled (Local: {app.config['CKEDITOR_SERVE_LOCAL']})")
         
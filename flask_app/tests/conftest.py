@@ -0,0 +1,8 @@
+import os
+import sys
+
+# app 모듈은 import 시 필수 환경 변수를 확인하므로 먼저 설정 (DB에는 연결하지 않음)
+os.environ.setdefault('FLASK_SECRET_KEY', 'test-secret-key')
+os.environ.setdefault('DB_PASSWORD', 'test-password')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+
+import pytest
+
+import app
+
+
+class FakeBlobCursor:
+    def __init__(self, blobs):
+        self.blobs = blobs
+        self.rowcount = 0
+        self.rows = []
+
+    def execute(self, query, params=()):
+        query = ' '.join(query.split())
+        if query.startswith('INSERT INTO file_blobs'):
+            sha256, file_name, file_size = params
+            if sha256 in self.blobs:
+                self.blobs[sha256]['ref_count'] += 1
+                self.rowcount = 2
+            else:
+                self.blobs[sha256] = {'file_name': file_name, 'file_size': file_size, 'ref_count': 1}
+                self.rowcount = 1
+        elif query.startswith('INSERT IGNORE INTO file_blobs'):
+            sha256, file_name = params
+            self.rowcount = 0 if sha256 in self.blobs else 1
+            if self.rowcount:
+                self.blobs[sha256] = {'file_name': file_name, 'file_size': 0, 'ref_count': 0}
+        elif query.startswith('SELECT file_name FROM file_blobs'):
+            self.rows = [(self.blobs[params[0]]['file_name'],)]
+        elif query.startswith('UPDATE file_blobs SET ref_count = ref_count - 1'):
+            self.blobs[params[0]]['ref_count'] -= 1
+        elif query.startswith('DELETE FROM file_blobs'):
+            blob = self.blobs.get(params[0])
+            # release_blobs(ref_count <= 0)와 remove_released_files의 빈 레코드 정리(ref_count = 0)
+            self.rowcount = 1 if blob and blob['ref_count'] <= 0 else 0
+            if self.rowcount:
+                del self.blobs[params[0]]
+        else:
+            raise AssertionError(f"unexpected query: {query}")
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeBlobDB:
+    """file_blobs 테이블만 흉내내는 연결"""
+
+    def __init__(self):
+        self.blobs = {}
+
+    def cursor(self, **kwargs):
+        return FakeBlobCursor(self.blobs)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeBlobDB()
+
+    @contextmanager
+    def get_db_connection(read_only=False):
+        yield db
+
+    monkeypatch.setattr(app, 'get_db_connection', get_db_connection)
+    return db
+
+
+@pytest.fixture
+def upload_folder(tmp_path, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    return tmp_path
+
+
+def store(file_name, data=b'data'):
+    with open(app.upload_path(file_name), 'wb') as f:
+        f.write(data)
+
+
+def test_acquire_counts_references(upload_folder, db):
+    sha256 = 'ab' * 32
+
+    assert app.acquire_blob(db, sha256, 4) == (sha256, True)
+    store(sha256)
+    assert app.acquire_blob(db, sha256, 4) == (sha256, False)
+    assert db.blobs[sha256]['ref_count'] == 2
+
+
+def test_acquire_rewrites_missing_file(upload_folder, db):
+    sha256 = 'cd' * 32
+    app.acquire_blob(db, sha256, 4)
+
+    # 레코드는 있지만 파일이 없으면 다시 써야 함
+    assert app.acquire_blob(db, sha256, 4) == (sha256, True)
+
+
+def test_release_returns_file_only_at_zero(upload_folder, db):
+    sha256 = 'ef' * 32
+    app.acquire_blob(db, sha256, 4)
+    store(sha256)
+    app.acquire_blob(db, sha256, 4)
+    file_info = {'file_name': sha256, 'blob_sha256': sha256}
+
+    assert app.release_blobs(db, [file_info]) == []
+    assert db.blobs[sha256]['ref_count'] == 1
+
+    released = app.release_blobs(db, [file_info])
+    assert released == [sha256]
+    assert sha256 not in db.blobs
+    # release_blobs는 파일을 지우지 않음 (commit 후 remove_released_files로 삭제)
+    assert app.find_upload(sha256) is not None
+
+    app.remove_released_files(released)
+    assert app.find_upload(sha256) is None
+
+
+def test_release_includes_legacy_files(upload_folder, db):
+    store('legacy_report.zip')
+
+    assert app.release_blobs(db, [{'file_name': 'legacy_report.zip', 'blob_sha256': None}]) == ['legacy_report.zip']
+    assert db.blobs == {}
+
+
+def test_release_keeps_file_reuploaded_before_removal(upload_folder, db):
+    sha256 = '12' * 32
+    app.acquire_blob(db, sha256, 4)
+    store(sha256)
+    released = app.release_blobs(db, [{'file_name': sha256, 'blob_sha256': sha256}])
+
+    # 삭제 commit과 파일 삭제 사이에 같은 내용이 다시 올라옴
+    assert app.acquire_blob(db, sha256, 4) == (sha256, True)
+    store(sha256)
+
+    app.remove_released_files(released)
+    assert app.find_upload(sha256) is not None
+    assert db.blobs[sha256]['ref_count'] == 1
+
+
+def test_remove_released_files_clears_lock_record(upload_folder, db):
+    sha256 = '34' * 32
+    app.acquire_blob(db, sha256, 4)
+    store(sha256)
+    released = app.release_blobs(db, [{'file_name': sha256, 'blob_sha256': sha256}])
+
+    app.remove_released_files(released)
+    assert app.find_upload(sha256) is None
+    assert db.blobs == {}
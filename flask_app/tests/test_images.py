@@ -0,0 +1,55 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def request_context(monkeypatch):
+    # Pillow 설치 여부와 관계없이 본문 변환만 확인
+    monkeypatch.setattr(app, 'Image', object())
+    with app.app.test_request_context('/', base_url='http://board.example'):
+        yield
+
+
+def test_rewrites_own_upload_urls(request_context):
+    for src in ['/uploads/0a1b2c3d.jpg', 'http://board.example/uploads/0a1b2c3d.jpg']:
+        html = app.responsive_images(f'<p><img src="{src}" alt="x"></p>')
+        assert 'src="/images/0a1b2c3d.jpg/800"' in html
+        assert 'srcset="/images/0a1b2c3d.jpg/320 320w' in html
+
+
+def test_leaves_other_images_untouched(request_context):
+    for tag in [
+        '<img src="https://example.com/uploads/photo.jpg">',
+        '<img src="http://board.example.evil/uploads/photo.jpg">',
+        '<img src="/static/uploads/photo.jpg">',
+        '<img src="/uploads/report.zip">',
+        '<img src="/uploads/0a1b2c3d.jpg" srcset="/a.jpg 1x">',
+    ]:
+        assert app.responsive_images(tag) == tag
+
+
+def test_derivatives_only_for_image_uploads(tmp_path, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    sha256 = 'ab' * 32
+    with open(app.upload_path(sha256), 'wb') as f:
+        f.write(b'not an image')
+
+    assert not app.is_image_upload(sha256)
+    assert app.make_image_derivative(sha256, 800) is None
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+    assert client.get(f'/images/{sha256}/800').status_code == 404
+
+
+def test_released_image_derivatives_are_removed(tmp_path, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    name = '0a1b2c3d.png'
+    paths = [app.upload_path(name)]
+    paths += [app.upload_path(f"0a1b2c3d.w{width}.webp") for width in app.IMAGE_DERIVATIVE_WIDTHS]
+    for path in paths:
+        open(path, 'wb').close()
+
+    app.remove_released_files([name])
+    assert not any(tmp_path.rglob('0a1b2c3d*'))
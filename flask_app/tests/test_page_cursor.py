@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+
+import app
+
+
+def tamper(token, **changes):
+    raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    payload = json.loads(raw)
+    payload.update(changes)
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def test_round_trip():
+    post = {'id': 42, 'created_at': datetime(2025, 3, 1, 9, 30, 15)}
+    token = app.encode_page_cursor('n', post, 3, skip=20)
+
+    assert '=' not in token
+    assert app.decode_page_cursor(token) == {
+        'direction': 'n',
+        'created_at': post['created_at'],
+        'id': 42,
+        'page': 3,
+        'skip': 20,
+    }
+    assert app.decode_page_cursor(app.encode_page_cursor('p', post, 1))['direction'] == 'p'
+
+
+def test_invalid_tokens_are_rejected():
+    for token in ['', 'not-a-cursor', '!!!', base64.urlsafe_b64encode(b'[1, 2]').decode('ascii')]:
+        assert app.decode_page_cursor(token) is None
+
+
+def test_tampered_values_are_rejected_or_clamped():
+    token = app.encode_page_cursor('n', {'id': 7, 'created_at': datetime(2025, 1, 1)}, 2)
+
+    assert app.decode_page_cursor(tamper(token, i='7 OR 1=1')) is None
+    assert app.decode_page_cursor(tamper(token, c='yesterday')) is None
+    assert app.decode_page_cursor(tamper(token, d='x'))['direction'] == 'n'
+    assert app.decode_page_cursor(tamper(token, pg=-5))['page'] == 1
+    assert app.decode_page_cursor(tamper(token, s=-1))['skip'] == 0
+    assert app.decode_page_cursor(tamper(token, s=10 ** 9))['skip'] == app.PAGINATION_MAX_OFFSET
@@ -0,0 +1,171 @@
+from array import array
+
+import pytest
+
+import app
+
+
+class FakeCursor:
+    def __init__(self, posts, on_select=None):
+        self.posts = posts
+        self.on_select = on_select
+        self.rows = []
+
+    def execute(self, query, params=()):
+        if 'IN (' in query:
+            self.rows = [(post_id, *self.posts[post_id]) for post_id in sorted(self.posts) if post_id in params]
+            return
+        max_id, limit = params[-2], params[-1]
+        self.rows = [(post_id, *self.posts[post_id]) for post_id in sorted(self.posts) if post_id > max_id][:limit]
+        if self.on_select:
+            on_select, self.on_select = self.on_select, None
+            on_select()
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeDB:
+    """posts: {id: (title, content)} - 색인 보충 쿼리(id > max_id, id IN (...))만 흉내냄"""
+
+    def __init__(self, posts, on_select=None):
+        self.posts = posts
+        self.on_select = on_select
+
+    def cursor(self, **kwargs):
+        cursor = FakeCursor(self.posts, self.on_select)
+        self.on_select = None
+        return cursor
+
+
+@pytest.fixture(autouse=True)
+def index_mode(monkeypatch):
+    monkeypatch.setattr(app, 'SEARCH_MODE', 'index')
+
+
+def search(index, db, keyword):
+    return index.search(db, 'posts', 'posts', ([], []), keyword)
+
+
+def test_tokenize_hangul_bigrams_and_strips_html():
+    assert app.tokenize_text('<p>서버&nbsp;점검</p>') == {'서버', '점검'}
+    assert app.tokenize_text('서버점검') == {'서버', '버점', '점검'}
+
+
+def test_tokenize_indexes_latin_prefixes_and_queries_whole_word():
+    assert app.tokenize_text('Server') == {'se', 'ser', 'serv', 'serve', 'server'}
+    assert app.tokenize_text('Server', query=True) == {'server'}
+    long_word = 'a' * 30
+    assert max(map(len, app.tokenize_text(long_word))) == app.SEARCH_INDEX_PREFIX_MAX
+    assert app.tokenize_text(long_word, query=True) == {'a' * app.SEARCH_INDEX_PREFIX_MAX}
+
+
+def test_search_builds_board_and_matches_prefix(tmp_path):
+    index = app.SearchIndex(str(tmp_path / 'index.bin'))
+    db = FakeDB({1: ('서버 점검', 'server room'), 2: ('서버 교체', ''), 3: ('네트워크', 'switch')})
+
+    assert list(search(index, db, '서버')) == [1, 2]
+    assert list(search(index, db, 'serv')) == [1]
+    assert list(search(index, db, '서버 점검')) == [1]
+    assert list(search(index, db, '없는말')) == []
+    # 한 글자 단어는 색인으로 찾을 수 없어 LIKE 검색으로 넘김
+    assert search(index, db, '서') is None
+    assert search(index, db, 'a') is None
+
+
+def test_merge_updates_and_removals(tmp_path):
+    index = app.SearchIndex(str(tmp_path / 'index.bin'))
+    db = FakeDB({1: ('서버 점검', ''), 2: ('서버 교체', '')})
+    search(index, db, '서버')
+
+    index.update_post('posts', 2, '서버 교체', '', '라우터 교체', '')
+    index.remove_post('posts', 1, '서버 점검', '')
+    index.index_post('posts', 5, '서버 증설', '')
+
+    assert list(search(index, db, '서버')) == [5]
+    assert list(search(index, db, '라우터')) == [2]
+    assert list(search(index, db, '교체')) == [2]
+
+
+def test_catch_up_reindexes_posts_changed_while_reading(tmp_path):
+    index = app.SearchIndex(str(tmp_path / 'index.bin'))
+    posts = {1: ('서버 점검', ''), 2: ('서버 교체', ''), 3: ('네트워크', '')}
+
+    def change_posts():
+        # 색인 보충이 DB를 읽은 뒤 다른 요청이 글을 수정/삭제
+        posts[2] = ('라우터 교체', '')
+        index.update_post('posts', 2, '서버 교체', '', '라우터 교체', '')
+        del posts[3]
+        index.remove_post('posts', 3, '네트워크', '')
+
+    db = FakeDB(posts, on_select=change_posts)
+    assert list(search(index, db, '서버')) == [1]
+    assert list(search(index, db, '라우터')) == [2]
+    assert list(search(index, db, '네트워크')) == []
+
+
+def test_flush_and_reload_round_trip(tmp_path):
+    path = tmp_path / 'index.bin'
+    index = app.SearchIndex(str(path))
+    db = FakeDB({1: ('서버 점검', 'server'), 2: ('서버 교체', '')})
+    search(index, db, '서버')
+    index.index_post('posts', 3, '서버 증설', '')
+    index.flush()
+
+    assert [p.name for p in tmp_path.iterdir()] == ['index.bin']
+    assert not index.dirty
+
+    reloaded = app.SearchIndex(str(path))
+    reloaded._load()
+    assert reloaded.boards['posts']['max_id'] == 2
+    assert reloaded._read_postings('posts', '서버') == array('I', [1, 2, 3])
+    assert reloaded._read_postings('posts', 'serv') == array('I', [1])
+
+    # 파일에서 읽은 배열을 수정한 뒤 다시 저장해도 유지됨
+    reloaded.remove_post('posts', 1, '서버 점검', 'server')
+    reloaded.flush()
+    again = app.SearchIndex(str(path))
+    again._load()
+    assert again._read_postings('posts', '서버') == array('I', [2, 3])
+    assert not again._read_postings('posts', 'serv')
+
+
+def test_load_ignores_incompatible_file(tmp_path):
+    path = tmp_path / 'index.bin'
+    path.write_bytes(b'WBSIDX1\n' + b'\0' * 32)
+    index = app.SearchIndex(str(path))
+    index._load()
+    assert index.boards == {}
+
+
+def test_changes_during_flush_are_kept(tmp_path, monkeypatch):
+    path = tmp_path / 'index.bin'
+    index = app.SearchIndex(str(path))
+    db = FakeDB({1: ('서버 점검', ''), 2: ('서버 교체', '')})
+    search(index, db, '서버')
+
+    fsync = app.os.fsync
+
+    def fsync_while_indexing(fd):
+        # 파일을 쓰는 동안(잠금 밖) 다른 요청이 글을 작성
+        monkeypatch.setattr(app.os, 'fsync', fsync)
+        index.index_post('posts', 3, '서버 증설', '')
+        fsync(fd)
+
+    monkeypatch.setattr(app.os, 'fsync', fsync_while_indexing)
+    index.flush()
+
+    assert index.dirty
+    assert index._read_postings('posts', '서버') == array('I', [1, 2, 3])
+    saved = app.SearchIndex(str(path))
+    saved._load()
+    assert saved._read_postings('posts', '서버') == array('I', [1, 2])
+
+    index.flush()
+    assert not index.dirty
+    again = app.SearchIndex(str(path))
+    again._load()
+    assert again._read_postings('posts', '서버') == array('I', [1, 2, 3])